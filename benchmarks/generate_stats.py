@@ -0,0 +1,85 @@
+"""
+Generate synthetic cod_ireland_stats.json-shaped histories for benchmarking.
+
+Series are written one at a time, so even the 1M-match history never has to
+fit in memory. Output is deterministic for a given seed.
+
+    python benchmarks/generate_stats.py 10000 bench_10k.json
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from stats_core import players, maps, game_modes
+
+def hardpoint_obj(rng):
+    seconds = rng.randint(0, 180)
+    style = rng.random()
+    if style < 0.45:
+        return f"{seconds // 60}:{seconds % 60:02d}"
+    if style < 0.9:
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+    return seconds
+
+def count_obj(rng, game_mode):
+    count = rng.randint(0, 6 if game_mode == "Control" else 3)
+    return str(count) if rng.random() < 0.8 else count
+
+def generate_match(rng, match_number):
+    game_mode = rng.choice(game_modes)
+    lineup = rng.sample(players, 4)
+    player_stats = []
+    for player in lineup:
+        player_stats.append({
+            "Player": player,
+            "Kills": rng.randint(5, 40),
+            "Deaths": rng.randint(5, 35),
+            "OBJ": hardpoint_obj(rng) if game_mode == "Hardpoint" else count_obj(rng, game_mode)
+        })
+    return {
+        "Game Mode": game_mode,
+        "Map": rng.choice(maps),
+        "Player Stats": player_stats,
+        "Match Number": match_number,
+        "Result": rng.choice(["Win", "Loss"])
+    }
+
+def generate_history(match_count, seed=0):
+    """Yield series until match_count matches have been produced."""
+    rng = random.Random(seed)
+    series_number = 1
+    produced = 0
+    while produced < match_count:
+        # Most series are a single saved round, as the app writes them
+        size = min(match_count - produced, 1 if rng.random() < 0.8 else rng.randint(2, 5))
+        yield {
+            "Series Number": series_number,
+            "Matches": [generate_match(rng, match_number) for match_number in range(1, size + 1)]
+        }
+        produced += size
+        series_number += 1
+
+def write_history(file_path, match_count, seed=0):
+    with open(file_path, "w") as file:
+        file.write("[")
+        for index, series in enumerate(generate_history(match_count, seed)):
+            file.write(",\n    " if index else "\n    ")
+            file.write(json.dumps(series, indent=4).replace("\n", "\n    "))
+        file.write("\n]")
+    return file_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("matches", type=int, help="number of matches to generate")
+    parser.add_argument("output", help="path of the JSON file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_history(args.output, args.matches, args.seed)
+    print(f"Wrote {args.matches} matches to {args.output}")
+
+if __name__ == "__main__":
+    main()
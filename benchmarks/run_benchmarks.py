@@ -0,0 +1,229 @@
+"""
+Headless benchmark harness for the stat tracker core.
+
+For each history size a synthetic stats file is generated (or reused from
+--data-dir) and load, search, totals, snapshot, export, sync and
+chart rendering are timed; export, sync and load are repeated for plain,
+gzip and zstd stats files (zstd is skipped when it is not available). Peak memory is measured in a second, tracemalloc-instrumented run of
+each operation so it does not distort the timings. Results are printed as
+JSON, or written to --output.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import shutil
+import platform
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from generate_stats import write_history
+from stats_core import load_stats_file, search_stats, compute_player_totals
+from search_index import SearchIndex
+from totals_store import TotalsStore
+from match_journal import compact
+from columnar_store import ColumnarStore
+from snapshot import write_snapshot, read_snapshot, snapshot_path_for
+from delta_sync import DeltaTransport, LocalFolderStore
+from charts import chart_plotters
+
+default_sizes = [1000, 10000, 100000, 1000000]
+
+search_queries = [
+    {"player_filter": "Bapper"},
+    {"player_filter": "Mixo", "map_filter": "Vault"},
+    {"map_filter": "Skyline", "mode_filter": "Hardpoint", "result_filter": "Win"},
+    {"objective_filter": "Time on Hill"},
+    {"mode_filter": "Hardpoint", "objective_filter": "02:02"},
+    {"player_filter": "Stevo", "map_filter": "Rewind", "mode_filter": "Control", "objective_filter": "3", "result_filter": "Loss"}
+]
+
+# Several filters at once, where intersecting posting lists costs the most
+combined_queries = [
+    {"player_filter": "Bapper", "map_filter": "Vault", "mode_filter": "Hardpoint", "result_filter": "Win"},
+    {"player_filter": "Stevo", "map_filter": "Rewind", "mode_filter": "Control", "objective_filter": "3", "result_filter": "Loss"},
+    {"player_filter": "Mixo", "map_filter": "Skyline", "objective_filter": "Time on Hill"}
+]
+
+def measure(name, func, measure_memory=True):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, {"operation": name, "seconds": round(elapsed, 6), "peak_bytes": peak}
+
+def count_rows(match_data):
+    return sum(len(match["Player Stats"]) for series in match_data for match in series["Matches"])
+
+def run_searches(search, queries=search_queries):
+    return sum(len(search(**query)) for query in queries)
+
+def render_charts(player_totals):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    for plotter in chart_plotters.values():
+        figure.clear()
+        plotter(figure.add_subplot(), player_totals)
+        canvas.draw()
+    return len(chart_plotters)
+
+def sync_round_trip(file_path, data_dir):
+    """Upload file_path to an empty folder store and download it back."""
+    remote_dir = os.path.join(data_dir, "remote")
+    state_path = os.path.join(data_dir, "sync_state.json")
+    download_path = file_path + ".sync"
+    for path in (state_path, download_path):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(remote_dir, ignore_errors=True)
+    transport = DeltaTransport(LocalFolderStore(remote_dir), state_path)
+    transport.upload(file_path, "stats.json")
+    return transport.download("stats.json", download_path)
+
+def bench_compression(match_data, size, data_dir, measure_memory=True):
+    missing_journal = os.path.join(data_dir, "no_journal.jsonl")
+    results = []
+    for compression in (None, "gzip", "zstd"):
+        label = compression or "json"
+        export_path = os.path.join(data_dir, f"export_{size}_{label}.json")
+        try:
+            _, result = measure(f"export_data_{label}", lambda: compact(match_data, export_path, missing_journal, compression), measure_memory)
+        except ValueError as e:
+            results.append({"operation": f"export_data_{label}", "skipped": str(e)})
+            continue
+        result["bytes"] = os.path.getsize(export_path)
+        results.append(result)
+
+        _, result = measure(f"sync_{label}", lambda: sync_round_trip(export_path, data_dir), measure_memory)
+        result["bytes"] = os.path.getsize(export_path)
+        results.append(result)
+
+        _, result = measure(f"load_init_data_{label}", lambda: load_stats_file(export_path), measure_memory)
+        results.append(result)
+        for path in (export_path, export_path + ".sync"):
+            os.remove(path)
+    shutil.rmtree(os.path.join(data_dir, "remote"), ignore_errors=True)
+    return results
+
+def bench_size(size, data_dir, measure_memory=True):
+    file_path = os.path.join(data_dir, f"bench_{size}.json")
+    if not os.path.exists(file_path):
+        write_history(file_path, size)
+    missing_journal = os.path.join(data_dir, "no_journal.jsonl")
+    results = []
+
+    match_data, result = measure("load_init_data", lambda: load_stats_file(file_path), measure_memory)
+    result["rows"] = count_rows(match_data)
+    results.append(result)
+
+    index, result = measure("search_index_build", lambda: SearchIndex(match_data), measure_memory)
+    results.append(result)
+
+    rows, result = measure("search_stats", lambda: run_searches(index.search), measure_memory)
+    result["rows"] = rows
+    result["queries"] = len(search_queries)
+    results.append(result)
+
+    rows, result = measure("search_stats_scan", lambda: run_searches(lambda **query: search_stats(match_data, **query)), measure_memory)
+    result["rows"] = rows
+    result["queries"] = len(search_queries)
+    results.append(result)
+
+    rows, result = measure("search_stats_combined", lambda: run_searches(index.search, combined_queries), measure_memory)
+    result["rows"] = rows
+    result["queries"] = len(combined_queries)
+    results.append(result)
+
+    rows, result = measure("search_stats_combined_scan", lambda: run_searches(lambda **query: search_stats(match_data, **query), combined_queries), measure_memory)
+    result["rows"] = rows
+    result["queries"] = len(combined_queries)
+    results.append(result)
+
+    store, result = measure("totals_store_build", lambda: TotalsStore(match_data), measure_memory)
+    results.append(result)
+
+    player_totals, result = measure("update_totals", store.player_totals, measure_memory)
+    result["rows"] = len(player_totals)
+    results.append(result)
+
+    _, result = measure("update_totals_recompute", lambda: compute_player_totals(match_data), measure_memory)
+    results.append(result)
+
+    columnar, result = measure("columnar_store_build", lambda: ColumnarStore(match_data), measure_memory)
+    result["bytes_per_row"] = round(columnar.memory_bytes() / max(1, len(columnar)), 2)
+    results.append(result)
+
+    rows, result = measure("search_stats_columnar", lambda: run_searches(columnar.filter), measure_memory)
+    result["rows"] = rows
+    result["queries"] = len(search_queries)
+    results.append(result)
+
+    _, result = measure("snapshot_write", lambda: write_snapshot(index, store, file_path), measure_memory)
+    result["bytes"] = os.path.getsize(snapshot_path_for(file_path))
+    results.append(result)
+
+    _, result = measure("snapshot_load", lambda: read_snapshot(file_path), measure_memory)
+    results.append(result)
+
+    export_path = os.path.join(data_dir, f"export_{size}.json")
+    _, result = measure("export_data", lambda: compact(match_data, export_path, missing_journal), measure_memory)
+    result["bytes"] = os.path.getsize(export_path)
+    results.append(result)
+    os.remove(export_path)
+
+    results.extend(bench_compression(match_data, size, data_dir, measure_memory))
+
+    if importlib.util.find_spec("matplotlib") is None:
+        results.append({"operation": "plot_charts", "skipped": "matplotlib is not installed"})
+    else:
+        _, result = measure("plot_charts", lambda: render_charts(player_totals), measure_memory)
+        results.append(result)
+
+    for result in results:
+        result["matches"] = size
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes, help="history sizes in matches")
+    parser.add_argument("--data-dir", help="where to keep generated histories (default: a temporary directory)")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        results = []
+        for size in args.sizes:
+            results.extend(bench_size(size, data_dir, not args.no_memory))
+            print(f"Benchmarked {size} matches", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
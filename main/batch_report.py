@@ -0,0 +1,151 @@
+"""
+Headless batch reports from a stats file.
+
+Loads the stats file (and its journal) without Tk or Google Drive, then makes
+one pass over the matches that feeds the per-player, per-map and per-mode
+totals and every requested search at the same time. Each report is written
+as CSV, JSON and/or HTML; with more than one worker the files are written
+across a process pool.
+
+    python main/batch_report.py cod_ireland_stats.json --output reports \\
+        --format csv html --search player=Bapper,map=Vault --search mode=Hardpoint
+
+Search specs are comma separated key=value filters using the keys player,
+map, mode, objective and result; --specs reads a JSON list of such objects.
+"""
+import os
+import re
+import csv
+import sys
+import html
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from stats_core import json_file_path, totals_rows, search_row, match_passes, stat_passes
+from totals_store import TotalsStore
+from leaderboards import LeaderboardStore, leaderboard_rows
+from match_journal import load_with_journal
+
+report_formats = ("csv", "json", "html")
+spec_keys = {"player": "player_filter", "map": "map_filter", "mode": "mode_filter",
+             "objective": "objective_filter", "result": "result_filter"}
+totals_columns = ("Player", "Total Kills", "Total Deaths", "Time on Hill", "Captures", "Plants", "K/D Ratio")
+search_columns = ("K/D", "Match", "Player", "Kills", "Deaths", "OBJ", "Map", "Mode", "Result")
+leaderboard_columns = ("Board", "Rank", "Player", "Value", "Record")
+
+def parse_spec(text):
+    """"player=Bapper,map=Vault" -> search_stats keyword arguments."""
+    spec = {}
+    for part in filter(None, text.split(",")):
+        key, _, value = part.partition("=")
+        if key.strip() not in spec_keys:
+            raise ValueError(f"Unknown search key {key.strip()!r} in {text!r}; use {', '.join(spec_keys)}")
+        spec[spec_keys[key.strip()]] = value.strip()
+    return spec
+
+def spec_name(spec):
+    label = "_".join(value for value in spec.values() if value) or "all"
+    return "search_" + re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-").lower()
+
+def split_rows(totals_by_key, label):
+    rows = []
+    for (player, key), totals in totals_by_key.items():
+        rows.append((key,) + totals_rows({player: totals})[0])
+    return (label,) + totals_columns, rows
+
+def build_reports(match_data, specs=()):
+    """
+    Return {report name: (columns, rows)} for totals, map and mode splits,
+    leaderboards and one search per spec, from a single pass over match_data.
+    """
+    totals_store = TotalsStore()
+    leaderboards = LeaderboardStore()
+    searches = [(spec_name(spec), spec, []) for spec in specs]
+    for series in match_data:
+        leaderboards.add_series(series)
+        for match in series["Matches"]:
+            totals_store.add_match(match)
+            for _, spec, rows in searches:
+                if not match_passes(match, spec.get("map_filter", ""), spec.get("mode_filter", ""), spec.get("result_filter", "")):
+                    continue
+                for stat in match["Player Stats"]:
+                    if stat_passes(match, stat, spec.get("player_filter", ""), spec.get("objective_filter", "")):
+                        rows.append(search_row(match, stat))
+
+    player_totals = totals_store.by_player
+    reports = {
+        "totals": (totals_columns, totals_rows(player_totals)),
+        "map_totals": split_rows(totals_store.by_player_map, "Map"),
+        "mode_totals": split_rows(totals_store.by_player_mode, "Mode"),
+        "leaderboards": (leaderboard_columns, leaderboard_rows(leaderboards))
+    }
+    for name, _, rows in searches:
+        reports[name] = (search_columns, rows)
+    return reports
+
+# Writers
+
+def write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+def write_json(path, columns, rows):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump([dict(zip(columns, row)) for row in rows], file, indent=4)
+
+def write_html(path, columns, rows):
+    title = html.escape(os.path.splitext(os.path.basename(path))[0].replace("_", " ").title())
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title></head><body>\n")
+        file.write(f"<h1>{title}</h1>\n<table border=\"1\">\n<tr>")
+        file.write("".join(f"<th>{html.escape(str(column))}</th>" for column in columns))
+        file.write("</tr>\n")
+        for row in rows:
+            file.write("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>\n")
+        file.write("</table>\n</body></html>\n")
+
+report_writers = {"csv": write_csv, "json": write_json, "html": write_html}
+
+def write_report(path, report_format, columns, rows):
+    report_writers[report_format](path, columns, rows)
+    return path
+
+def write_reports(reports, output_dir, formats=report_formats, workers=1):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(os.path.join(output_dir, f"{name}.{report_format}"), report_format, columns, rows)
+            for name, (columns, rows) in reports.items() for report_format in formats]
+    if workers <= 1 or len(jobs) <= 1:
+        return [write_report(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(write_report, *zip(*jobs)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("stats_file", nargs="?", default=json_file_path, help="stats JSON file (its journal is replayed too)")
+    parser.add_argument("--output", default="reports", help="directory to write the reports to")
+    parser.add_argument("--format", nargs="+", choices=report_formats, default=list(report_formats), help="report formats to write")
+    parser.add_argument("--search", action="append", default=[], help="search spec such as player=Bapper,map=Vault (repeatable)")
+    parser.add_argument("--specs", help="JSON file holding a list of search specs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes used to write the files")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = [parse_spec(text) for text in args.search]
+        if args.specs:
+            with open(args.specs, "r", encoding="utf-8") as file:
+                specs.extend(parse_spec(",".join(f"{key}={value}" for key, value in spec.items())) for spec in json.load(file))
+        journal_path = os.path.splitext(args.stats_file)[0] + ".journal.jsonl"
+        match_data = load_with_journal(args.stats_file, journal_path)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    paths = write_reports(build_reports(match_data, specs), args.output, args.format, args.workers)
+    print(f"Wrote {len(paths)} report files to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Bulk import: merge many stats files into one history.
+
+Sources can be directories (every *.json, *.json.gz and *.json.zst file in
+them) or glob patterns; compressed files are detected by content.
+Files are parsed and validated in a process pool, then merged in sorted path
+order so the result does not depend on which worker finished first. Each
+match is identified by a hash of its content (mode, map, result and player
+stats, ignoring match and series numbers), and matches already in the
+history or seen in an earlier file are skipped. The new series from each
+file keep their grouping but are renumbered to follow the existing history,
+with matches renumbered from 1 within each series.
+
+    python main/bulk_import.py exports/ "night-*.json" --into cod_ireland_stats.json
+"""
+import os
+import sys
+import glob
+import argparse
+from json import JSONDecodeError
+from concurrent.futures import ProcessPoolExecutor
+
+from stats_core import json_file_path, compression_formats, load_stats_file, new_series, match_hash
+from match_journal import load_with_journal, compact
+
+stats_file_patterns = ("*.json", "*.json.gz", "*.json.zst")
+
+def collect_paths(sources):
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for pattern in stats_file_patterns:
+                paths.update(glob.glob(os.path.join(source, pattern)))
+        else:
+            paths.update(path for path in glob.glob(source) if os.path.isfile(path))
+    return sorted(paths)
+
+def parse_file(path):
+    """Load one file; returns (path, match_data, error message)."""
+    try:
+        return path, load_stats_file(path), None
+    except (OSError, JSONDecodeError, ValueError) as e:
+        return path, None, str(e)
+
+def parse_files(paths, workers=1):
+    if workers <= 1 or len(paths) <= 1:
+        return [parse_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+def merge_stats(match_data, parsed):
+    """
+    Append the new matches from parsed (parse_file results) to match_data in
+    place. Returns a summary with counts and any per-file errors.
+    """
+    seen = {match_hash(match) for series in match_data for match in series["Matches"]}
+    next_number = match_data[-1]["Series Number"] + 1 if match_data else 1
+    summary = {"files": 0, "series": 0, "matches": 0, "duplicates": 0, "errors": []}
+
+    for path, file_data, error in sorted(parsed, key=lambda result: result[0]):
+        if error is not None:
+            summary["errors"].append(f"{path}: {error}")
+            continue
+        summary["files"] += 1
+        for series in file_data:
+            merged = new_series(next_number)
+            for match in series["Matches"]:
+                digest = match_hash(match)
+                if digest in seen:
+                    summary["duplicates"] += 1
+                    continue
+                seen.add(digest)
+                merged["Matches"].append(dict(match, **{"Match Number": len(merged["Matches"]) + 1}))
+            if merged["Matches"]:
+                match_data.append(merged)
+                next_number += 1
+                summary["series"] += 1
+                summary["matches"] += len(merged["Matches"])
+    return summary
+
+def bulk_import(sources, match_data, workers=None):
+    paths = collect_paths(sources)
+    return merge_stats(match_data, parse_files(paths, workers or os.cpu_count() or 1))
+
+def describe(summary):
+    text = (f"Merged {summary['matches']} new match(es) in {summary['series']} series from {summary['files']} file(s); "
+            f"skipped {summary['duplicates']} duplicate(s).")
+    if summary["errors"]:
+        text += f"\n{len(summary['errors'])} file(s) could not be read:\n" + "\n".join(summary["errors"])
+    return text
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="directories or glob patterns of stats files")
+    parser.add_argument("--into", default=json_file_path, help="stats file to merge into")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes used to parse the files")
+    parser.add_argument("--compress", choices=compression_formats, help="write the merged file compressed (default: plain JSON)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be merged without writing")
+    args = parser.parse_args(argv)
+
+    journal_path = os.path.splitext(args.into)[0] + ".journal.jsonl"
+    match_data = load_with_journal(args.into, journal_path) if os.path.exists(args.into) else []
+    summary = bulk_import(args.sources, match_data, args.workers)
+    if summary["matches"] and not args.dry_run:
+        compact(match_data, args.into, journal_path, args.compress)
+    print(describe(summary))
+    return 1 if summary["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Chart rendering for the Charts tab.
+
+Charts are drawn from per-player totals (one bar per player), so the cost of
+a redraw depends on the roster size, not on how many matches are stored. One
+Figure and one Tk canvas are created on first use and redrawn in place. The
+Figure is built directly rather than through pyplot so nothing is kept in
+pyplot's global figure registry. matplotlib is only imported on first plot.
+"""
+
+from diagnostics import span, timed
+
+chart_types = ["Kills vs Deaths", "Objectives", "Recent Form"]
+
+def plot_kills_vs_deaths(ax, player_totals):
+    players = list(player_totals)
+    kills = [totals["kills"] for totals in player_totals.values()]
+    deaths = [totals["deaths"] for totals in player_totals.values()]
+
+    ax.bar(players, kills, label='Kills')
+    ax.bar(players, deaths, label='Deaths', bottom=kills)
+    ax.set_xlabel('Players')
+    ax.set_ylabel('Count')
+    ax.set_title('Kills vs Deaths')
+    ax.legend()
+
+def plot_objectives(ax, player_totals):
+    players = list(player_totals)
+    positions = range(len(players))
+    width = 0.27
+    series = (
+        ("Time on Hill (min)", [totals["time_on_hill"] / 60 for totals in player_totals.values()]),
+        ("Captures", [totals["captures"] for totals in player_totals.values()]),
+        ("Plants", [totals["plants"] for totals in player_totals.values()])
+    )
+
+    for offset, (label, values) in enumerate(series):
+        ax.bar([position + (offset - 1) * width for position in positions], values, width, label=label)
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(players)
+    ax.set_xlabel('Players')
+    ax.set_ylabel('Objectives')
+    ax.set_title('Objectives by Player')
+    ax.legend()
+
+def plot_recent_form(ax, player_trends):
+    players = list(player_trends)
+    positions = range(len(players))
+    width = 0.4
+
+    ax.bar([position - width / 2 for position in positions], [trend["kd"] for trend in player_trends.values()], width, label='K/D')
+    ax.bar([position + width / 2 for position in positions], [trend["win_rate"] for trend in player_trends.values()], width, label='Win Rate')
+    ax.axhline(1.0, color='grey', linewidth=0.8)
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(players)
+    ax.set_xlabel('Players')
+    ax.set_title('Recent Form')
+    ax.legend()
+
+chart_plotters = {
+    "Kills vs Deaths": plot_kills_vs_deaths,
+    "Objectives": plot_objectives
+}
+
+# Charts drawn from TrendStore.player_trends rather than per-player totals
+trend_chart_plotters = {
+    "Recent Form": plot_recent_form
+}
+
+class ChartPanel:
+    def __init__(self, frame):
+        self.frame = frame
+        self.figure = None
+        self.canvas = None
+
+    def _ensure_canvas(self):
+        if self.canvas is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.figure = Figure()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        # draw_idle renders later from the Tk loop; time that render separately from plotting
+        self.canvas.draw = timed("chart render")(self.canvas.draw)
+
+    def plot(self, chart_type, data):
+        """Draw chart_type from per-player totals, or per-player trends for trend charts."""
+        plotter = chart_plotters.get(chart_type) or trend_chart_plotters.get(chart_type)
+        if plotter is None:
+            return
+        with span(f"plot {chart_type}") as timing:
+            timing.rows = len(data)
+            self._ensure_canvas()
+            self.figure.clear()
+            plotter(self.figure.add_subplot(), data)
+        self.canvas.draw_idle()
+
+    def close(self):
+        if self.canvas is not None:
+            self.figure.clear()
+            self.canvas.get_tk_widget().destroy()
+            self.figure = None
+            self.canvas = None
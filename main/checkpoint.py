@@ -0,0 +1,232 @@
+"""
+Background checkpointing of saved matches.
+
+save() only queues a series; a worker thread writes queued series to the
+journal in one append and one fsync (a group commit) once the oldest has
+waited `interval` seconds or `max_pending` have built up, so a busy scrim
+costs one disk flush every few seconds and no disk I/O on the Tk thread.
+Compactions (the full rewrite of the stats file through a temp file, fsync
+and rename) run on the same thread, after any queued series, either on
+request or once the journal reaches match_journal.compact_every records,
+and are written with the given compression (None for plain JSON).
+After a crash the journal is replayed on the next start, so at most the
+last `interval` seconds of saves are lost; stop() flushes everything.
+The worker owns series numbering on disk: a rewrite renumbers the history so
+numbers strictly increase, and a series saved with a number the last rewrite
+already used (a round saved while a merge ran) is journaled renumbered to
+follow it.
+Completion callbacks run on the Tk thread via attach(), as in SyncWorker.
+
+With build_indexes on, each compaction also indexes the history it wrote and
+writes a snapshot of those indexes beside the final snapshot path, still on
+the worker thread. on_compacted receives (saves, match_data, indexes), where
+saves is the number of save() calls the history covers and indexes is
+(search_index, totals_store, snapshot temp path); the Tk thread only has to
+swap them in and rename the file.
+"""
+import time
+import queue
+import threading
+
+from stats_core import json_file_path
+from match_journal import (journal_file_path, append_series_batch, needs_compaction, load_with_journal, compact,
+                           renumbered, renumber_history)
+from search_index import SearchIndex
+from totals_store import TotalsStore
+from snapshot import write_snapshot, snapshot_path_for
+
+class Checkpointer:
+    def __init__(self, file_path=json_file_path, journal_path=journal_file_path, interval=2.0, max_pending=20,
+                 on_progress=None, on_compacted=None, compression=None, build_indexes=False):
+        self.file_path = file_path
+        self.journal_path = journal_path
+        self.interval = interval
+        self.max_pending = max_pending
+        self.on_progress = on_progress
+        self.on_compacted = on_compacted
+        self.compression = compression
+        self.build_indexes = build_indexes
+        self.saves = 0
+        self.last_series = None  # last series number on disk, once the worker has written the history
+        self.pending = []
+        self.pending_since = None
+        self.compactions = []
+        self.busy = False
+        self.failed = False
+        self.flushing = False
+        self.stopping = False
+        self.condition = threading.Condition()
+        self.events = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+        self.thread.start()
+
+    # Called from the Tk thread
+
+    def save(self, series):
+        with self.condition:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.append(series)
+            self.saves += 1
+            self.condition.notify_all()
+
+    def compact(self, match_data=None, on_done=None, update=None):
+        """
+        Rewrite the stats file after everything queued so far. match_data is
+        the full history to write, or None to read it back from disk. update,
+        if given, is called with that history on the worker thread first and
+        may change it in place; returning False skips the rewrite.
+        """
+        with self.condition:
+            history = list(match_data) if match_data is not None else None
+            self.compactions.append((history, on_done, update, self.saves))
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until everything queued is on disk; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            try:
+                while self.pending or self.compactions or self.busy:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+                return True
+            finally:
+                self.flushing = False
+
+    def stop(self, timeout=None):
+        flushed = self.flush(timeout)
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        self.process_events()
+        return flushed
+
+    def attach(self, root, interval=100):
+        """Run queued progress/completion callbacks on the Tk thread."""
+        self.process_events()
+        root.after(interval, self.attach, root, interval)
+
+    def process_events(self):
+        while True:
+            try:
+                callback, args = self.events.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    # Worker thread
+
+    def _emit(self, callback, *args):
+        if callback is not None:
+            self.events.put((callback, args))
+
+    def _due(self):
+        """When the queued series should be written, or None if nothing is queued."""
+        if not self.pending:
+            return None
+        if self.failed:
+            return self.pending_since + self.interval
+        if self.flushing or len(self.pending) >= self.max_pending:
+            return 0.0
+        return self.pending_since + self.interval
+
+    def _ready(self):
+        if self.compactions or self.stopping:
+            return True
+        due = self._due()
+        return due is not None and time.monotonic() >= due
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self._ready():
+                    due = self._due()
+                    self.condition.wait(None if due is None else max(0.0, due - time.monotonic()))
+                if self.stopping and not self.pending and not self.compactions:
+                    return
+                batch, self.pending = self.pending, []
+                compactions, self.compactions = self.compactions, []
+                saves = self.saves
+                self.busy = True
+
+            try:
+                written = self._write(batch, compactions, saves)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+            if not written and self.stopping:
+                return
+
+    def _numbered(self, batch):
+        """batch with any series numbered at or below the last one on disk renumbered to follow it."""
+        if self.last_series is None:
+            return batch
+        numbered = []
+        for series in batch:
+            if series["Series Number"] <= self.last_series:
+                series = renumbered(series, self.last_series + 1)
+            self.last_series = series["Series Number"]
+            numbered.append(series)
+        return numbered
+
+    def _write(self, batch, compactions, saves):
+        if batch:
+            try:
+                last_series = self.last_series
+                batch = self._numbered(batch)
+                append_series_batch(batch, self.journal_path)
+                self.failed = False
+                self._emit(self.on_progress, f"Checkpointed {len(batch)} match(es).")
+            except OSError as e:
+                # Keep the batch at the front of the queue and try again next interval
+                self.last_series = last_series
+                with self.condition:
+                    self.pending[:0] = batch
+                    self.pending_since = time.monotonic()
+                    self.failed = True
+                self._emit(self.on_progress, f"Checkpoint failed, will retry: {e}")
+                for compaction in compactions:
+                    self._emit(compaction[1], False, e)
+                return False
+
+        if not compactions and needs_compaction(self.journal_path):
+            compactions = [(None, None, None, saves)]
+        for match_data, on_done, update, covered in compactions:
+            if match_data is not None and covered < saves:
+                # Series saved after the request were journaled above; the rewrite must keep them
+                match_data.extend(batch[max(0, len(batch) - (saves - covered)):])
+                covered = saves
+            try:
+                if match_data is None:
+                    match_data = load_with_journal(self.file_path, self.journal_path)
+                if update is None or update(match_data) is not False:
+                    last_series = renumber_history(match_data)
+                    compact(match_data, self.file_path, self.journal_path, self.compression)
+                    self.last_series = last_series
+                    self._emit(self.on_compacted, (covered, match_data, self._index(match_data)))
+                self._emit(on_done, True, None)
+            except Exception as e:
+                self._emit(self.on_progress, f"Saving {self.file_path} failed: {e}")
+                self._emit(on_done, False, e)
+        return True
+
+    def _index(self, match_data):
+        """Indexes for the history just written, with their snapshot in a temp file, or None."""
+        if not self.build_indexes:
+            return None
+        try:
+            search_index = SearchIndex(match_data)
+            totals_store = TotalsStore(match_data)
+            snapshot_path = write_snapshot(search_index, totals_store, self.file_path,
+                                           snapshot_path_for(self.file_path) + ".new")
+        except OSError as e:
+            self._emit(self.on_progress, f"Writing the snapshot failed: {e}")
+            return None
+        return search_index, totals_store, snapshot_path
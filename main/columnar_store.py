@@ -0,0 +1,213 @@
+"""
+Compact columnar store of player stat rows.
+
+Each player stat is one row spread over typed array columns (kills, deaths,
+obj, match id, series id) with player, map, game mode and result stored as
+small integer codes into per-column dictionaries. A row costs about 25 bytes
+instead of a dict per stat. When NumPy is installed, filter() runs as
+vectorised comparisons over zero-copy views of the arrays; otherwise the
+same result comes from a plain loop. SearchIndex answers searches with it.
+"""
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from stats_core import objective_modes, mmss_to_seconds, seconds_to_mmss
+
+class Dictionary:
+    """Assigns small integer codes to strings in order of first appearance."""
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+class ColumnarStore:
+    row_columns = (("kills", "i"), ("deaths", "i"), ("obj", "i"), ("match_id", "i"),
+                   ("player", "H"), ("map", "B"), ("mode", "B"), ("result", "B"))
+    match_columns = (("series_id", "i"), ("match_number", "i"))
+    all_columns = row_columns + match_columns + (("series_numbers", "i"),)
+    column_types = dict(all_columns)
+
+    def __init__(self, match_data=None):
+        self.clear()
+        if match_data:
+            self.build(match_data)
+
+    def clear(self):
+        for name, typecode in self.all_columns:
+            setattr(self, name, array(typecode))
+        self.read_only = False
+        self.players = Dictionary()
+        self.maps = Dictionary()
+        self.modes = Dictionary()
+        self.results = Dictionary()
+
+    def build(self, match_data):
+        self.clear()
+        for series in match_data:
+            self.add_series(series)
+
+    def start_series(self, series_number):
+        self._make_writable()
+        self.series_numbers.append(series_number)
+        return len(self.series_numbers) - 1
+
+    def add_series(self, series):
+        series_id = self.start_series(series["Series Number"])
+        for match in series["Matches"]:
+            self.add_match(match, series_id)
+
+    def add_match(self, match, series_id=None):
+        self._make_writable()
+        if series_id is None:
+            series_id = len(self.series_numbers) - 1
+        match_id = len(self.series_id)
+        self.series_id.append(series_id)
+        match_number = match.get("Match Number")
+        # Files written by hand or round-tripped through sqlite carry "" or null here
+        self.match_number.append(match_number if type(match_number) is int else -1)
+
+        map_code = self.maps.encode(match["Map"])
+        mode_code = self.modes.encode(match["Game Mode"])
+        result_code = self.results.encode(match.get("Result", ""))
+        for stat in match["Player Stats"]:
+            self.kills.append(stat["Kills"])
+            self.deaths.append(stat["Deaths"])
+            self.obj.append(stat["OBJ"])
+            self.match_id.append(match_id)
+            self.player.append(self.players.encode(stat["Player"]))
+            self.map.append(map_code)
+            self.mode.append(mode_code)
+            self.result.append(result_code)
+
+    def __len__(self):
+        return len(self.kills)
+
+    def columns(self):
+        """(name, typecode, column) for every array, in a fixed order."""
+        return [(name, typecode, getattr(self, name)) for name, typecode in self.all_columns]
+
+    def _make_writable(self):
+        # Columns mapped from a snapshot are read-only memoryviews until first written
+        if self.read_only:
+            for name, typecode, column in self.columns():
+                setattr(self, name, array(typecode, column))
+            self.read_only = False
+
+    def memory_bytes(self):
+        return sum(column.itemsize * len(column) for _, _, column in self.columns())
+
+    def _view(self, name):
+        return np.frombuffer(getattr(self, name), dtype=self.column_types[name])
+
+    def iter_series(self):
+        """Series rebuilt from the columns, in load order, for consumers that replay history."""
+        series = match = None
+        current_series = current_match = -1
+        for row in range(len(self)):
+            match_id = self.match_id[row]
+            if match_id != current_match:
+                current_match = match_id
+                series_id = self.series_id[match_id]
+                if series_id != current_series:
+                    if series is not None:
+                        yield series
+                    current_series = series_id
+                    series = {"Series Number": self.series_numbers[series_id], "Matches": []}
+                match, _ = self.row(row)
+                match["Player Stats"] = []
+                series["Matches"].append(match)
+            match["Player Stats"].append(self.row(row)[1])
+        if series is not None:
+            yield series
+
+    # Filters
+
+    def _objective_conditions(self, objective_filter):
+        """(mode code or None, obj value or None) pairs, any of which selects a row."""
+        if objective_filter in objective_modes:
+            return [(self.modes.codes.get(objective_modes[objective_filter], -1), None)]
+        conditions = []
+        try:
+            value = int(objective_filter)
+        except ValueError:
+            value = None
+        if value is not None and str(value) == objective_filter:
+            conditions.append((None, value))
+        elif ":" in objective_filter:
+            try:
+                seconds = mmss_to_seconds(objective_filter)
+            except ValueError:
+                seconds = None
+            if seconds is not None and seconds_to_mmss(seconds) == objective_filter:
+                conditions.append((self.modes.codes.get("Hardpoint", -1), seconds))
+        return conditions
+
+    def filter(self, player_filter="", map_filter="", mode_filter="", objective_filter="", result_filter="", within=None):
+        """Row indexes matching the filters, in load order; within limits the scan to those (increasing) rows."""
+        equals = []
+        for column, dictionary, value in (("player", self.players, player_filter), ("map", self.maps, map_filter),
+                                          ("mode", self.modes, mode_filter), ("result", self.results, result_filter)):
+            if value:
+                equals.append((column, dictionary.codes.get(value, -1)))
+        objective = self._objective_conditions(objective_filter) if objective_filter else None
+
+        if np is not None:
+            select = slice(None) if within is None else np.asarray(within, dtype=np.int64)
+            size = len(self) if within is None else len(select)
+            mask = np.ones(size, dtype=bool)
+            for column, code in equals:
+                mask &= self._view(column)[select] == code
+            if objective is not None:
+                any_objective = np.zeros(size, dtype=bool)
+                for mode_code, value in objective:
+                    condition = np.ones(size, dtype=bool)
+                    if mode_code is not None:
+                        condition &= self._view("mode")[select] == mode_code
+                    if value is not None:
+                        condition &= self._view("obj")[select] == value
+                    any_objective |= condition
+                mask &= any_objective
+            hits = np.flatnonzero(mask)
+            return (hits if within is None else select[hits]).tolist()
+
+        rows = []
+        columns = [(getattr(self, column), code) for column, code in equals]
+        for row in range(len(self)) if within is None else within:
+            if all(column[row] == code for column, code in columns) and \
+            (objective is None or any((mode_code is None or self.mode[row] == mode_code) and
+                                      (value is None or self.obj[row] == value) for mode_code, value in objective)):
+                rows.append(row)
+        return rows
+
+    def row(self, row):
+        match_id = self.match_id[row]
+        match_number = self.match_number[match_id]
+        match = {
+            "Game Mode": self.modes.values[self.mode[row]],
+            "Map": self.maps.values[self.map[row]],
+            "Match Number": match_number if match_number >= 0 else "",
+            "Result": self.results.values[self.result[row]]
+        }
+        stat = {
+            "Player": self.players.values[self.player[row]],
+            "Kills": self.kills[row],
+            "Deaths": self.deaths[row],
+            "OBJ": self.obj[row]
+        }
+        return match, stat
@@ -0,0 +1,131 @@
+"""
+Delta-aware sync transport.
+
+DeltaTransport sits between SyncWorker and a remote file store. It remembers,
+per remote file name, the remote file ID, the last revision seen and the MD5
+of the content last synced, in a small JSON state file. Uploads of unchanged
+content are skipped and changed content updates the existing remote file by ID
+instead of creating a duplicate. An upload is refused with SyncConflict when
+a differing remote file was never synced from here, or its revision is no
+longer the one last synced, so another machine's upload is never
+overwritten; the caller downloads and merges the remote copy first. Downloads are skipped when the remote revision (or checksum) matches
+what is already on disk.
+
+A store provides find(name), get(file_id), create(local_path, name),
+update(file_id, local_path) and fetch(file_id, local_path), each returning
+metadata as {"id", "revision", "md5"}. drive_sync.DriveStore talks to Google
+Drive; LocalFolderStore keeps files in a folder for offline use.
+"""
+import os
+import json
+import shutil
+import hashlib
+
+from diagnostics import timed
+from sync_worker import SyncConflict
+
+sync_state_path = "cod_ireland_stats.sync.json"
+
+def file_md5(file_path):
+    digest = hashlib.md5()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class LocalFolderStore:
+    """Stand-in for Google Drive that keeps the remote files in a local folder."""
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _meta(self, file_id):
+        path = os.path.join(self.folder, file_id)
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        return {"id": file_id, "revision": f"{stat.st_mtime_ns}-{stat.st_size}", "md5": file_md5(path)}
+
+    def find(self, name):
+        return self._meta(name)
+
+    def get(self, file_id):
+        return self._meta(file_id)
+
+    def update(self, file_id, local_path):
+        temp_path = os.path.join(self.folder, file_id + ".tmp")
+        shutil.copyfile(local_path, temp_path)
+        os.replace(temp_path, os.path.join(self.folder, file_id))
+        return self._meta(file_id)
+
+    def create(self, local_path, name):
+        return self.update(name, local_path)
+
+    def fetch(self, file_id, local_path):
+        meta = self._meta(file_id)
+        if meta is None:
+            raise FileNotFoundError(f"File {file_id} not found in {self.folder}.")
+        shutil.copyfile(os.path.join(self.folder, file_id), local_path)
+        return meta
+
+class DeltaTransport:
+    def __init__(self, store, state_path=sync_state_path):
+        self.store = store
+        self.state_path = state_path
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, name, meta, md5):
+        self.state[name] = {"id": meta["id"], "revision": meta["revision"], "md5": md5}
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.state, file, indent=4)
+        os.replace(temp_path, self.state_path)
+
+    def _remote_meta(self, name):
+        entry = self.state.get(name)
+        meta = self.store.get(entry["id"]) if entry else None
+        return meta if meta is not None else self.store.find(name)
+
+    @timed("sync upload")
+    def upload(self, local_path, remote_name):
+        md5 = file_md5(local_path)
+        entry = self.state.get(remote_name)
+        if entry and entry["md5"] == md5:
+            return "unchanged"
+
+        meta = self._remote_meta(remote_name)
+        if meta is not None and meta.get("md5") == md5:
+            self._save_state(remote_name, meta, md5)
+            return "unchanged"
+        if meta is not None and (entry is None or meta["revision"] != entry["revision"]):
+            # Never synced from here (no state yet) or changed since: the remote copy may hold matches we lack
+            raise SyncConflict(f"{remote_name} was changed remotely since the last sync.", remote_name)
+        if meta is not None:
+            meta = self.store.update(meta["id"], local_path)
+        else:
+            meta = self.store.create(local_path, remote_name)
+        self._save_state(remote_name, meta, md5)
+        return "uploaded"
+
+    @timed("sync download")
+    def download(self, remote_name, local_path):
+        meta = self._remote_meta(remote_name)
+        if meta is None:
+            raise FileNotFoundError(f"File {remote_name} not found.")
+
+        entry = self.state.get(remote_name)
+        if os.path.exists(local_path):
+            local_md5 = file_md5(local_path)
+            if (entry and entry["revision"] == meta["revision"] and entry["md5"] == local_md5) or meta.get("md5") == local_md5:
+                return "unchanged"
+
+        meta = self.store.fetch(meta["id"], local_path)
+        self._save_state(remote_name, meta, file_md5(local_path))
+        return "downloaded"
@@ -0,0 +1,163 @@
+"""
+Timing instrumentation for the hot paths, and on-demand cProfile dumps.
+
+Functions wrapped with @timed("name") (or blocks in `with span("name")`)
+record their latency into a per-name histogram with fixed millisecond
+buckets, along with call and row counts. Recording is off unless
+COD_STATS_DIAGNOSTICS=1 is set or enable() is called; while off a wrapped
+call costs one attribute check. Recording is thread safe, so Drive calls on
+the sync thread land in the same histograms as the Tk thread's work.
+
+start_profile()/stop_profile(path) run cProfile on the calling thread (the
+Tk thread in the app) and write a .prof file for pstats or snakeviz.
+"""
+import os
+import time
+import cProfile
+import threading
+from bisect import bisect_left
+from functools import wraps
+
+bucket_bounds_ms = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+default_profile_path = "cod_stats.prof"
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(bucket_bounds_ms) + 1)
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def add(self, elapsed_ms, rows=None):
+        self.counts[bisect_left(bucket_bounds_ms, elapsed_ms)] += 1
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+        if rows is not None:
+            self.rows += rows
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls (max_ms for the last bucket)."""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return bucket_bounds_ms[index] if index < len(bucket_bounds_ms) else self.max_ms
+        return 0.0
+
+    def buckets(self):
+        """"<=1ms:3 <=5ms:1 ..." for the non-empty buckets."""
+        labels = [f"<={bound}ms" for bound in bucket_bounds_ms] + [f">{bucket_bounds_ms[-1]}ms"]
+        return " ".join(f"{label}:{count}" for label, count in zip(labels, self.counts) if count)
+
+class Recorder:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.profiler = None
+
+    def record(self, name, elapsed_ms, rows=None):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(elapsed_ms, rows)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+recorder = Recorder(os.environ.get("COD_STATS_DIAGNOSTICS") == "1")
+
+def enable(enabled=True):
+    recorder.enabled = enabled
+
+def is_enabled():
+    return recorder.enabled
+
+def reset():
+    recorder.reset()
+
+def timed(name, rows=None):
+    """Decorator recording each call under name; rows(result) gives the row count."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            recorder.record(name, (time.perf_counter() - start) * 1000, rows(result) if rows else None)
+            return result
+        return wrapper
+    return decorate
+
+class Span:
+    """Times a with block; set .rows inside the block to record a row count."""
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        recorder.record(self.name, (time.perf_counter() - self.start) * 1000, self.rows)
+
+class _NullSpan:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+_null_span = _NullSpan()
+
+def span(name):
+    return Span(name) if recorder.enabled else _null_span
+
+# Reporting
+
+diagnostics_columns = ("Operation", "Calls", "Rows", "Mean ms", "p50 ms", "p95 ms", "Max ms", "Last ms", "Histogram")
+
+def diagnostics_rows():
+    """One row per instrumented operation, most total time first; p50/p95 are bucket upper bounds."""
+    with recorder.lock:
+        histograms = sorted(recorder.histograms.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return [
+            (name, histogram.calls, histogram.rows, round(histogram.total_ms / histogram.calls, 1),
+             histogram.percentile(0.5), histogram.percentile(0.95), round(histogram.max_ms, 1),
+             round(histogram.last_ms, 1), histogram.buckets())
+            for name, histogram in histograms
+        ]
+
+def slowest(limit=3):
+    """Short "name mean ms" summary of the operations with the most total time, for a status bar."""
+    return ", ".join(f"{row[0]} {row[3]} ms" for row in diagnostics_rows()[:limit])
+
+# Profiling
+
+def profiling():
+    return recorder.profiler is not None
+
+def start_profile():
+    if recorder.profiler is None:
+        recorder.profiler = cProfile.Profile()
+        recorder.profiler.enable()
+
+def stop_profile(path=default_profile_path):
+    """Stop the running profile and write it to path; returns the path, or None if none was running."""
+    profiler, recorder.profiler = recorder.profiler, None
+    if profiler is None:
+        return None
+    profiler.disable()
+    profiler.dump_stats(path)
+    return path
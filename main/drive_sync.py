@@ -0,0 +1,105 @@
+"""
+Google Drive access for the stat tracker.
+
+pydrive is imported and the OAuth flow is run the first time Drive is actually
+used, not when this module is imported.
+"""
+import os
+
+from diagnostics import timed
+
+client_secrets_file = os.path.abspath("main/client_secrets.json")
+credentials_file = os.path.abspath("main/credentials.json")
+
+_drive = None
+
+# Google Drive Authentication
+
+def get_drive():
+    global _drive
+    if _drive is not None:
+        return _drive
+
+    from pydrive.auth import GoogleAuth
+    from pydrive.drive import GoogleDrive
+
+    gauth = GoogleAuth()
+
+    print(f"Client secrets file path: {client_secrets_file}")
+    print(f"Credentials file path: {credentials_file}")
+
+    if not os.path.exists(client_secrets_file):
+        print(f"Client secrets file does not exist at path: {client_secrets_file}")
+    else:
+        print(f"Client secrets file found at path: {client_secrets_file}")
+
+    gauth.settings["client_config_file"] = client_secrets_file
+
+    gauth.LoadCredentialsFile(credentials_file)
+
+    try:
+        if gauth.credentials is None:
+            gauth.LocalWebserverAuth()
+        elif gauth.access_token_expired:
+            gauth.Refresh()
+        else:
+            gauth.Authorize()
+    except Exception as e:
+        print(f"Failed to authenticate: {e}")
+        gauth.LocalWebserverAuth()
+
+    gauth.SaveCredentialsFile(credentials_file)
+
+    _drive = GoogleDrive(gauth)
+    return _drive
+
+class DriveStore:
+    """Remote file store for delta_sync.DeltaTransport backed by Google Drive."""
+    def _meta(self, file):
+        return {
+            "id": file["id"],
+            "revision": str(file.get("version") or file.get("modifiedDate")),
+            "md5": file.get("md5Checksum")
+        }
+
+    @timed("drive find")
+    def find(self, name):
+        file_list = get_drive().ListFile({
+            'q': f"title='{name}' and trashed=false",
+            'orderBy': 'modifiedDate desc',
+            'maxResults': 1
+        }).GetList()
+        return self._meta(file_list[0]) if file_list else None
+
+    @timed("drive get")
+    def get(self, file_id):
+        from pydrive.files import ApiRequestError
+
+        file = get_drive().CreateFile({'id': file_id})
+        try:
+            file.FetchMetadata(fields="id,version,modifiedDate,md5Checksum,labels")
+        except ApiRequestError:
+            return None
+        if file.get("labels", {}).get("trashed"):
+            return None
+        return self._meta(file)
+
+    @timed("drive create")
+    def create(self, local_path, name):
+        file = get_drive().CreateFile({'title': name})
+        file.SetContentFile(local_path)
+        file.Upload()
+        return self._meta(file)
+
+    @timed("drive update")
+    def update(self, file_id, local_path):
+        file = get_drive().CreateFile({'id': file_id})
+        file.SetContentFile(local_path)
+        file.Upload()
+        return self._meta(file)
+
+    @timed("drive fetch")
+    def fetch(self, file_id, local_path):
+        file = get_drive().CreateFile({'id': file_id})
+        file.GetContentFile(local_path)
+        return self._meta(file)
@@ -0,0 +1,117 @@
+"""
+Top-k leaderboards, kept up to date as matches are saved.
+
+Every board has a scope: overall, per map, per game mode or per map x mode
+("" stands for any). Single-match records (most kills, best K/D, best OBJ)
+are bounded min-heaps of k entries per scope, so a new stat either replaces
+the smallest entry or is dropped, in O(log k). Best OBJ only has scopes with
+a game mode, since OBJ values only compare within a mode. Player boards
+(total kills, K/D, time on hill...) rank running per-player totals for the
+scope, and each series keeps its own top-k from when it was added. No query
+walks the match history.
+"""
+import heapq
+from itertools import count
+
+from stats_core import new_player_totals, add_stat_to_totals, kd_ratio, format_obj
+
+default_k = 10
+
+record_boards = {
+    "Most Kills": lambda game_mode, stat: stat["Kills"],
+    "Best K/D": lambda game_mode, stat: kd_ratio(stat["Kills"], stat["Deaths"]),
+    "Best OBJ": lambda game_mode, stat: stat["OBJ"]
+}
+player_boards = {
+    "Total Kills": lambda totals: totals["kills"],
+    "K/D Ratio": lambda totals: kd_ratio(totals["kills"], totals["deaths"]),
+    "Time on Hill": lambda totals: totals["time_on_hill"],
+    "Captures": lambda totals: totals["captures"],
+    "Plants": lambda totals: totals["plants"]
+}
+
+class LeaderboardStore:
+    def __init__(self, match_data=None, k=default_k):
+        self.k = k
+        self.clear()
+        if match_data:
+            self.build(match_data)
+
+    def clear(self):
+        self.records = {}
+        self.totals = {}
+        self.series_boards = {}
+        self.sequence = count()
+
+    def build(self, match_data):
+        self.clear()
+        for series in match_data:
+            self.add_series(series)
+
+    def _push(self, key, value, entry):
+        heap = self.records.get(key)
+        if heap is None:
+            heap = self.records[key] = []
+        # Ties keep the earlier record: later entries compare lower
+        item = (value, -next(self.sequence), entry)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def add_series(self, series):
+        series_totals = {}
+        for match in series["Matches"]:
+            map_name, game_mode = match["Map"], match["Game Mode"]
+            scopes = (("", ""), (map_name, ""), ("", game_mode), (map_name, game_mode))
+            for stat in match["Player Stats"]:
+                entry = {"Player": stat["Player"], "Kills": stat["Kills"], "Deaths": stat["Deaths"],
+                         "OBJ": format_obj(game_mode, stat["OBJ"]), "Map": map_name, "Mode": game_mode,
+                         "Series": series["Series Number"], "Match": match.get("Match Number", "")}
+                for board, value in record_boards.items():
+                    for scope in scopes[2:] if board == "Best OBJ" else scopes:
+                        self._push((board,) + scope, value(game_mode, stat), entry)
+
+                for players in [self.totals.setdefault(scope, {}) for scope in scopes] + [series_totals]:
+                    if stat["Player"] not in players:
+                        players[stat["Player"]] = new_player_totals()
+                    add_stat_to_totals(players[stat["Player"]], game_mode, stat)
+
+        self.series_boards[series["Series Number"]] = {
+            board: heapq.nlargest(self.k, ((value(totals), player) for player, totals in series_totals.items()))
+            for board, value in player_boards.items()
+        }
+
+    # Queries
+
+    def records_for(self, board, map_name="", game_mode=""):
+        """Top single-match entries for a record board, best first, as (value, entry) pairs."""
+        heap = self.records.get((board, map_name, game_mode), [])
+        return [(value, entry) for value, _, entry in sorted(heap, reverse=True)]
+
+    def player_board(self, board, map_name="", game_mode=""):
+        """Top players for a player board, best first, as (value, player) pairs."""
+        players = self.totals.get((map_name, game_mode), {})
+        return heapq.nlargest(self.k, ((player_boards[board](totals), player) for player, totals in players.items()))
+
+    def series_board(self, series_number, board):
+        return self.series_boards.get(series_number, {}).get(board, [])
+
+def display_value(board, value):
+    if board in ("Best K/D", "K/D Ratio"):
+        return f"{value:.2f}"
+    if board == "Time on Hill":
+        return format_obj("Hardpoint", value)
+    return str(value)
+
+def leaderboard_rows(leaderboards, map_name="", game_mode=""):
+    """(Board, Rank, Player, Value, Record) rows for every board in one scope."""
+    rows = []
+    for board in player_boards:
+        for rank, (value, player) in enumerate(leaderboards.player_board(board, map_name, game_mode), start=1):
+            rows.append((board, rank, player, display_value(board, value), ""))
+    for board in record_boards:
+        for rank, (value, entry) in enumerate(leaderboards.records_for(board, map_name, game_mode), start=1):
+            shown = entry["OBJ"] if board == "Best OBJ" else display_value(board, value)
+            rows.append((board, rank, entry["Player"], shown, f"Series {entry['Series']} match {entry['Match']}, {entry['Map']} {entry['Mode']}"))
+    return rows
@@ -0,0 +1,122 @@
+"""
+Lineup analytics: how player combinations do on each map and mode.
+
+Each match's roster is encoded as a bitmask with one bit per player, so a
+lineup is a single int that can be used directly as a dictionary key. Wins,
+losses, kills and deaths are aggregated per lineup and per pair of players,
+for every map x mode as well as per map, per mode and overall ("" stands for
+any). Matches are added one at a time as they are saved, and a query such as
+"best lineup for Hardpoint on Skyline" only looks at the lineups seen in that
+bucket, never at the match history.
+"""
+from itertools import combinations
+
+from stats_core import players, kd_ratio
+
+def new_lineup_totals():
+    return {"matches": 0, "wins": 0, "losses": 0, "kills": 0, "deaths": 0}
+
+def win_rate(totals):
+    return totals["wins"] / totals["matches"] if totals["matches"] else 0.0
+
+class LineupIndex:
+    def __init__(self, match_data=None):
+        self.bits = {}
+        self.names = []
+        for player in players:
+            self.bit(player)
+        self.clear()
+        if match_data:
+            self.build(match_data)
+
+    def clear(self):
+        self.lineups = {}
+        self.pairs = {}
+
+    def bit(self, player):
+        bit = self.bits.get(player)
+        if bit is None:
+            bit = self.bits[player] = 1 << len(self.names)
+            self.names.append(player)
+        return bit
+
+    def mask(self, lineup):
+        mask = 0
+        for player in lineup:
+            mask |= self.bit(player)
+        return mask
+
+    def lineup_names(self, mask):
+        return [name for position, name in enumerate(self.names) if mask >> position & 1]
+
+    def build(self, match_data):
+        self.clear()
+        for series in match_data:
+            self.add_series(series)
+
+    def add_series(self, series):
+        for match in series["Matches"]:
+            self.add_match(match)
+
+    def add_match(self, match):
+        # A player listed twice (old files allowed it) counts once, with their stats combined
+        roster = {}
+        for stat in match["Player Stats"]:
+            bit = self.bit(stat["Player"])
+            kills, deaths = roster.get(bit, (0, 0))
+            roster[bit] = (kills + stat["Kills"], deaths + stat["Deaths"])
+        mask = 0
+        for bit in roster:
+            mask |= bit
+        self._add(self.lineups, match, mask,
+                  sum(kills for kills, _ in roster.values()), sum(deaths for _, deaths in roster.values()))
+        for (first_bit, first), (second_bit, second) in combinations(roster.items(), 2):
+            self._add(self.pairs, match, first_bit | second_bit, first[0] + second[0], first[1] + second[1])
+
+    def add_store(self, store):
+        """Add every match held in a ColumnarStore, e.g. one loaded from a snapshot."""
+        for series in store.iter_series():
+            self.add_series(series)
+
+    def _add(self, index, match, mask, kills, deaths):
+        result = match.get("Result", "")
+        for bucket in ((match["Map"], match["Game Mode"]), (match["Map"], ""), ("", match["Game Mode"]), ("", "")):
+            lineups = index.setdefault(bucket, {})
+            totals = lineups.get(mask)
+            if totals is None:
+                totals = lineups[mask] = new_lineup_totals()
+            totals["matches"] += 1
+            totals["wins"] += result == "Win"
+            totals["losses"] += result == "Loss"
+            totals["kills"] += kills
+            totals["deaths"] += deaths
+
+    # Queries
+
+    def lineup_totals(self, lineup, map_name="", game_mode=""):
+        mask = self.mask(lineup)
+        index = self.pairs if bin(mask).count("1") == 2 else self.lineups
+        return index.get((map_name, game_mode), {}).get(mask, new_lineup_totals())
+
+    def best(self, map_name="", game_mode="", size=4, min_matches=1, limit=5):
+        """
+        The best lineups (size players) or pairs (size 2) for a map and mode,
+        ranked by win rate, then matches played, then K/D. Returns
+        (player names, totals) pairs.
+        """
+        index = self.pairs if size == 2 else self.lineups
+        candidates = [(mask, totals) for mask, totals in index.get((map_name, game_mode), {}).items()
+                      if totals["matches"] >= min_matches and (size == 2 or bin(mask).count("1") == size)]
+        candidates.sort(key=lambda item: (win_rate(item[1]), item[1]["matches"],
+                                          kd_ratio(item[1]["kills"], item[1]["deaths"])), reverse=True)
+        return [(self.lineup_names(mask), totals) for mask, totals in candidates[:limit]]
+
+def lineup_rows(ranked):
+    """Display rows for LineupIndex.best results."""
+    return [(" / ".join(names), totals["matches"], totals["wins"], totals["losses"], f"{win_rate(totals):.0%}",
+             f"{kd_ratio(totals['kills'], totals['deaths']):.2f}") for names, totals in ranked]
+
+def lineup_sort_rows(ranked):
+    """Typed sort keys matching lineup_rows, column for column."""
+    return [(" / ".join(names), totals["matches"], totals["wins"], totals["losses"], win_rate(totals),
+             kd_ratio(totals["kills"], totals["deaths"])) for names, totals in ranked]
@@ -1,13 +1,36 @@
+import time
+_start_time = time.perf_counter()
+
 import sys
 import os 
-import json
+import shutil
 import tkinter as tk
-from PIL import ImageTk, Image
 from tkinter import ttk, messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from pydrive.auth import GoogleAuth
-from pydrive.drive import GoogleDrive
+from json import JSONDecodeError
+
+from stats_core import (
+    json_file_path, backup_file_path, players, maps, game_modes, mode_objectives,
+    new_series, obj_value, init_data_file,
+    totals_rows, totals_sort_rows, search_row, search_sort_row
+)
+from search_index import SearchIndex
+from search_cache import SearchCache
+from totals_store import TotalsStore
+from leaderboards import LeaderboardStore, leaderboard_rows
+from lineup_stats import LineupIndex, lineup_rows, lineup_sort_rows
+from trend_stats import TrendStore, trend_rows, trend_sort_rows, default_window
+from virtual_grid import VirtualGrid
+from charts import ChartPanel, chart_types, trend_chart_plotters
+from bulk_import import bulk_import, describe as describe_import
+from match_journal import load_with_journal, read_journal, unreplayed_series, renumbered
+from checkpoint import Checkpointer
+from snapshot import read_snapshot, write_snapshot, release_snapshot, snapshot_path_for
+from sync_worker import SyncWorker, SyncCancelled, SyncConflict
+from delta_sync import DeltaTransport, LocalFolderStore
+from diagnostics import (
+    timed, enable as enable_diagnostics, is_enabled as diagnostics_enabled, reset as reset_diagnostics,
+    diagnostics_columns, diagnostics_rows, slowest, profiling, start_profile, stop_profile, default_profile_path
+)
 
 """
 try and build and dl exe to google drive for use by others. or git hub it
@@ -16,160 +39,251 @@ work on ui
 better user experience
 
 """
-# Google Drive Authentication
-
-gauth = GoogleAuth()
-client_secrets_file = os.path.abspath("main/client_secrets.json")
-credentials_file = os.path.abspath("main/credentials.json")
-
-print(f"Client secrets file path: {client_secrets_file}")
-print(f"Credentials file path: {credentials_file}")
-
-if not os.path.exists(client_secrets_file):
-    print(f"Client secrets file does not exist at path: {client_secrets_file}")
-else:
-    print(f"Client secrets file found at path: {client_secrets_file}")
-
-gauth.settings["client_config_file"] = client_secrets_file
-
-gauth.LoadCredentialsFile(credentials_file)
-
-try:
-    if gauth.credentials is None:
-        gauth.LocalWebserverAuth()
-    elif gauth.access_token_expired:
-        gauth.Refresh()
-    else:
-        gauth.Authorize()
-except Exception as e:
-    print(f"Failed to authenticate: {e}")
-    gauth.LocalWebserverAuth()
 
-gauth.SaveCredentialsFile(credentials_file)
-
-drive = GoogleDrive(gauth)
-
-json_file_path = "cod_ireland_stats.json"
-
-players = ["Bapper", "Jordy", "Stevo", "Varel", "Mixo", "Hok-Tuah"]
-maps = ["Vault", "Skyline", "Rewind", "Protocall", "Red Card"]
-game_modes = ["Hardpoint", "Control", "Search and Destroy"]
-objectives = ["Time on Hill", "Plants", "Captures"]
-match_data = []
-current_series = {"Series Number": 1, "Matches": []}
+match_data = []  # None while the indexes come from the snapshot; the checkpointer reads the file when it needs the history
+current_series = new_series()
+search_index = SearchIndex()
+search_cache = SearchCache(search_index)
+totals_store = TotalsStore(verify=os.environ.get("COD_STATS_VERIFY_TOTALS") == "1")
+storage_backend = os.environ.get("COD_STATS_BACKEND", "json")
+storage_compression = os.environ.get("COD_STATS_COMPRESSION") or None  # "gzip" or "zstd"; unset writes plain JSON
+sqlite_store = None
+remote_file_path = json_file_path + ".remote"  # Drive copy merged in after an upload conflict
+sync_worker = None
+checkpointer = None
+search_debounce_ms = 150
+lineup_index = None  # built on first use; see get_lineup_index
+trend_store = None  # built on first use; see get_trend_store
+leaderboards = None  # built on first use; see get_leaderboards
+chart_panel = None  # set by create_charts_tab; closed in on_close
+installed_history = None  # (history, indexes installed) from the last compaction whose history the app took
 
 # File Related Functions
 
-def download_from_google_drive(file_name, local_path):
-    try:
-        file_list = drive.ListFile({'q': f"title='{file_name}'"}).GetList()
-        print(f"File list: {file_list}")
-        if file_list:
-            file_drive = file_list[0]
-            file_drive.GetContentFile(local_path)
-            return True
-        else:
-            print(f"File {file_name} not found on Google Drive.")
-            return False
-    except Exception as e:
-        print(f"Failed to download file from Google Drive: {e}")
-        return False
-
-def upload_to_google_drive(file_path):
+def show_load_progress(series_count):
+    root.title(f"CoD Stats Tracker - loading ({series_count} series)")
+    root.update_idletasks()
+
+def load_match_data(file_path):
+    global sqlite_store
+    if storage_backend == "sqlite":
+        from sqlite_store import open_store
+        if sqlite_store is None:
+            sqlite_store = open_store(file_path)
+        return sqlite_store.to_match_data()
+    return load_with_journal(file_path, progress=show_load_progress)
+
+def series_count():
+    return len(search_index.store.series_numbers)
+
+def last_series_number():
+    series_numbers = search_index.store.series_numbers
+    return series_numbers[-1] if len(series_numbers) else 0
+
+def search_source():
+    return sqlite_store if sqlite_store is not None else search_index
+
+@timed("search_results", rows=len)
+def search_results(*filters):
+    source = search_source()
+    if search_cache.source is not source:
+        search_cache.clear(source)
+    return search_cache.search(*filters)
+
+def current_player_totals():
+    if sqlite_store is not None:
+        return sqlite_store.player_totals()
+    return totals_store.player_totals()
+
+def get_lineup_index():
+    global lineup_index
+    if lineup_index is None:
+        lineup_index = LineupIndex()
+        lineup_index.add_store(search_index.store)
+    return lineup_index
+
+def get_trend_store(window=default_window):
+    global trend_store
+    if trend_store is None or trend_store.window != window:
+        trend_store = TrendStore(window=window)
+        for series in search_index.store.iter_series():
+            trend_store.add_series(series)
+    return trend_store
+
+def get_leaderboards():
+    global leaderboards
+    if leaderboards is None:
+        leaderboards = LeaderboardStore()
+        for series in search_index.store.iter_series():
+            leaderboards.add_series(series)
+    return leaderboards
+
+def rebuild_indexes():
+    global lineup_index, trend_store, leaderboards
+    search_index.build(match_data)
+    totals_store.build(match_data)
+    search_cache.clear()
+    lineup_index = None
+    trend_store = None
+    leaderboards = None
+
+def index_series(series):
+    search_index.add_series(series)
+    totals_store.add_series(series)
+    search_cache.clear()
+    if lineup_index is not None:
+        lineup_index.add_series(series)
+    if trend_store is not None:
+        trend_store.add_series(series)
+    if leaderboards is not None:
+        leaderboards.add_series(series)
+
+def use_snapshot():
+    return storage_backend != "sqlite" and not totals_store.verify
+
+def save_snapshot(file_path=json_file_path):
+    if not use_snapshot():
+        return
     try:
-        file = drive.CreateFile({'title': os.path.basename(file_path)})
-        file.SetContentFile(file_path)
-        file.Upload()
-        return True
-    except Exception as e:
-        print(f"Failed to upload file to Google Drive: {e}")
+        write_snapshot(search_index, totals_store, file_path)
+    except OSError as e:
+        print(f"Failed to write snapshot: {e}")
+
+def load_snapshot(file_path):
+    """Take the indexes from a current snapshot plus any newer journal records."""
+    global match_data, search_index, totals_store, lineup_index, trend_store, leaderboards
+    snapshot = read_snapshot(file_path) if use_snapshot() else None
+    if snapshot is None:
         return False
-    
-def init_data_file():
-    if not os.path.exists(json_file_path):
-        try:
-            with open(json_file_path, "w") as file:
-                json.dump([], file)
-        except Exception as e:
-            print(f"Failed to initialize data file: {e}")
-
+    search_index, totals_store = snapshot
+    lineup_index = None
+    trend_store = None
+    leaderboards = None
+    match_data = None
+    for series in unreplayed_series(read_journal(), last_series_number(), search_index.store.iter_series()):
+        index_series(series)
+    return True
+
+def load_stats(file_path):
+    global match_data, current_series
+    if not load_snapshot(file_path):
+        match_data = load_match_data(file_path)
+        rebuild_indexes()
+        save_snapshot(file_path)
+    current_series = new_series(last_series_number() + 1)
+
+def make_sync_transport():
+    sync_dir = os.environ.get("COD_STATS_SYNC_DIR")
+    if sync_dir:
+        return DeltaTransport(LocalFolderStore(sync_dir))
+    from drive_sync import DriveStore
+    return DeltaTransport(DriveStore())
+
+def set_sync_status(message):
+    status_var.set(message)
+
+def cancel_sync():
+    if sync_worker is not None:
+        sync_worker.cancel_all()
+
+def on_initial_download(success, error):
+    download_path = json_file_path + ".download"
+    if success:
+        if series_count():
+            print(f"Matches were saved before the download finished; Drive copy kept at {download_path}")
+            return
+        os.replace(download_path, json_file_path)
+        if sqlite_store is not None:
+            # The database was migrated from the empty placeholder file at startup
+            sqlite_store.replace_all(load_with_journal(json_file_path))
+        load_init_data()
+    elif not isinstance(error, (FileNotFoundError, SyncCancelled)):
+        print(f"Failed to download file from Google Drive: {error}")
+
+@timed("load_init_data", rows=lambda _: series_count())
 def load_init_data():
     global match_data, current_series
-    if not os.path.exists(json_file_path):
-        download_from_google_drive("cod_ireland_stats.json", json_file_path)
     if os.path.exists(json_file_path):
         try:
-            with open(json_file_path, "r") as file:
-                match_data = json.load(file)
-                if match_data:
-                    current_series = match_data[-1].copy()
-                else:
-                    current_series = {"Series Number": 1, "Matches": []}
-        except json.JSONDecodeError:
+            load_stats(json_file_path)
+        except (JSONDecodeError, ValueError):
             messagebox.showerror("Error", "Failed to load initial data.")
             match_data = []
-            current_series = {"Series Number": 1, "Matches": []}
+            current_series = new_series()
+            rebuild_indexes()
         except Exception as e:
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
             match_data = []
-            current_series = {"Series Number": 1, "Matches": []}
+            current_series = new_series()
+            rebuild_indexes()
     else:
         match_data = []
-        current_series = {"Series Number": 1, "Matches": []}
+        current_series = new_series()
+        rebuild_indexes()
 
-def import_data():
-    global match_data, current_series
+def bulk_import_data():
+    folder = filedialog.askdirectory(title="Select a folder of stats files to merge")
+    if not folder:
+        return
 
-    file_path = json_file_path
+    def on_merged(success, error, summary):
+        if not success:
+            print(f"Error in bulk_import_data: {error}")
+            messagebox.showerror("Error", f"Bulk import failed: {error}")
+            return
+        messagebox.showinfo("Bulk Import", describe_import(summary))
 
-    if not file_path:
-        messagebox.showinfo("Info", "No file selected.")
-        return
+    set_sync_status(f"Importing stats files from {folder}...")
+    merge_stats_files([folder], on_merged)
 
-    try:
-        with open(file_path, "r") as file:
-            imported_data = json.load(file)
-
-        if not isinstance(imported_data, list):
-            raise ValueError("Invalid data format: Expected a list of series data.")
-
-        for series in imported_data:
-            if not isinstance(series, dict):
-                raise ValueError(f"Invalid series structure in JSON data: {series}")
-            if "Series Number" not in series or "Matches" not in series:
-                raise ValueError(f"Missing keys in series: {series}")
-
-            for match in series["Matches"]:
-                if not isinstance(match, dict):
-                    raise ValueError(f"Invalid match structure in JSON data: {match}")
-                if "Game Mode" not in match or "Map" not in match or "Player Stats" not in match:
-                    raise ValueError(f"Missing keys in match: {match}")
-
-                for player_stats in match["Player Stats"]:
-                    if not isinstance(player_stats, dict):
-                        raise ValueError(f"Invalid player stats structure in JSON data: {player_stats}")
-                    if "Player" not in player_stats or "Kills" not in player_stats or "Deaths" not in player_stats or "OBJ" not in player_stats:
-                        raise ValueError(f"Missing keys in player stats: {player_stats}")
-                    
-                    if match["Game Mode"] == "Hardpoint":
-                        if isinstance(player_stats["OBJ"], str):
-                            player_stats["OBJ"] = mmss_to_seconds(player_stats["OBJ"])
-                        else:
-                            raise ValueError(f"Invalid OBJ format for Hardpoint: {player_stats['OBJ']}")
-
-        match_data = imported_data
-        if match_data:
-            current_series = match_data[-1].copy()
-        else:
-            current_series = {"Series Number": 1, "Matches": []}
-        messagebox.showinfo("Success", f"Data imported successfully from {file_path}.")
+def merge_stats_files(sources, on_done):
+    """Merge stats files into the history; on_done(success, error, summary) runs on the Tk thread."""
+    global current_series
+    if sqlite_store is not None:
+        try:
+            # Parse in this process: pool workers would re-import this module and open windows
+            summary = bulk_import(sources, match_data, workers=1)
+            if summary["matches"]:
+                sqlite_store.replace_all(match_data)
+                rebuild_indexes()
+                current_series = new_series(last_series_number() + 1)
+        except Exception as e:
+            on_done(False, e, None)
+            return
+        on_done(True, None, summary)
+        return
 
-    except json.JSONDecodeError:
-        messagebox.showerror("Error", "The selected file is not a valid JSON file.")
-    except ValueError as ve:
-        messagebox.showerror("Error", f"Data validation failed: {ve}")
-    except Exception as e:
-        messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+    summary = {}
+    merged = []
+    target = []
+
+    def merge(history):
+        # Runs on the checkpointer thread, after any queued saves
+        start = len(history)
+        summary.update(bulk_import(sources, history, workers=1))
+        merged.extend(history[start:])
+        target.append(history)
+        return summary["matches"] > 0
+
+    def on_merged(success, error):
+        global current_series
+        if success and summary["matches"]:
+            history, indexed = installed_history or (None, False)
+            if history is target[0] and match_data is not None and not indexed:
+                # on_checkpoint_compacted took the merged history but built no indexes for it
+                rebuild_indexes()
+            elif history is not target[0] or not indexed:
+                # Rounds saved during the merge kept this view; add the merged series after them. On disk the
+                # checkpointer numbers those rounds after the merge; the view catches up at the next compaction.
+                for series in merged:
+                    series = renumbered(series, last_series_number() + 1)
+                    if match_data is not None and history is not target[0]:
+                        match_data.append(series)
+                    index_series(series)
+            current_series = new_series(last_series_number() + 1)
+        on_done(success, error, summary)
+
+    checkpointer.compact(match_data, on_done=on_merged, update=merge)
 
 def save_round():
     player_stats = []
@@ -181,19 +295,22 @@ def save_round():
         objectives = obj_entry.get()
 
         if selected_player:
-            if not (kills.isdigit() and deaths.isdigit() and objectives.replace(':', '').isdigit()):
+            if any(stat["Player"] == selected_player for stat in player_stats):
+                messagebox.showerror("Error", f"{selected_player} is selected more than once.")
+                return
+            try:
+                if not (kills.isdigit() and deaths.isdigit() and objectives.replace(':', '').isdigit()):
+                    raise ValueError(objectives)
+                obj = obj_value(mode_var.get(), objectives)
+            except ValueError:
                 messagebox.showerror("Error", f"Please enter valid stats for {selected_player}.")
                 return
 
-            obj_value = objectives
-            if mode_var.get() == "Hardpoint":
-                obj_value = seconds_to_mmss(mmss_to_seconds(objectives))
-
             player_stats.append({
                 "Player": selected_player,
                 "Kills": int(kills),
                 "Deaths": int(deaths),
-                "OBJ": obj_value
+                "OBJ": obj
             })
     
     if not player_stats:
@@ -220,14 +337,26 @@ def save_round():
         "Result": "Win" if win_var.get() else "Loss"
         }
     current_series["Matches"].append(current_match_data)
+    index_series(current_series)
 
     messagebox.showinfo("Success", f"Match {current_match_data['Match Number']} for Series {current_series['Series Number']} has been saved.")
     clear_all_inputs()
-    match_data.append(current_series.copy())
+    series = current_series.copy()
+    if match_data is not None:
+        match_data.append(series)
+    try:
+        if sqlite_store is not None:
+            sqlite_store.add_series(series)
+        else:
+            checkpointer.save(series)
+    except Exception as e:
+        print(f"Error in save_round: {e}")
+        messagebox.showerror("Error", f"Failed to save match: {e}")
     clear_all_series_data()
 
+@timed("export_data")
 def export_data():
-    if not match_data:
+    if not series_count():
         messagebox.showerror("Error", "No match details to export.")
         return
 
@@ -237,20 +366,90 @@ def export_data():
         return
 
     try:
-        with open(file_path, "w") as file:
-            json.dump(match_data, file, indent=4)
-        if not upload_to_google_drive(file_path):
-            with open("backup_cod_ireland_stats.json", "w") as backup_file:
-                json.dump(match_data, backup_file, indent=4)
-            messagebox.showinfo("Success", f"Exported successfully to backup_cod_ireland_stats.json as a backup.")
+        if sqlite_store is not None:
+            sqlite_store.export_json(file_path, storage_compression)
+            sync_worker.upload(file_path, on_done=on_export_uploaded)
         else:
-            messagebox.showinfo("Success", f"Exported successfully to Google Drive.")
+            checkpointer.compact(match_data, on_done=on_export_saved)
     except Exception as e:
         print(f"Error in export_data: {e}")
         messagebox.showerror("Error", f"Failed to save file: {e}")
 
-init_data_file()
-load_init_data()
+def on_export_saved(success, error):
+    if success:
+        sync_worker.upload(json_file_path, on_done=on_export_uploaded)
+        return
+    print(f"Error in export_data: {error}")
+    messagebox.showerror("Error", f"Failed to save file: {error}")
+
+def on_remote_downloaded(success, error):
+    if not success:
+        on_export_uploaded(False, error)
+        return
+    merge_stats_files([remote_file_path], on_remote_merged)
+
+def on_remote_merged(success, error, summary):
+    if success and summary["errors"]:
+        success, error = False, ValueError("; ".join(summary["errors"]))
+    if not success:
+        on_export_uploaded(False, error)
+        return
+    os.remove(remote_file_path)
+    if sqlite_store is not None:
+        sqlite_store.export_json(json_file_path, storage_compression)
+    set_sync_status(describe_import(summary))
+    sync_worker.upload(json_file_path, on_done=on_export_uploaded)
+
+def on_checkpoint_compacted(result):
+    """Install the history and indexes the checkpointer thread built for the rewritten file."""
+    global match_data, search_index, totals_store, lineup_index, trend_store, leaderboards, installed_history
+    saves, history, indexes = result
+    # Nothing saved since the compaction was queued: its history is the app's history
+    current = saves == checkpointer.saves
+    installed_history = (history, indexes is not None) if current else None
+    if current and match_data is not None:
+        match_data = history
+        # COD_STATS_VERIFY_TOTALS checks reads against this list; keep it on the live history
+        totals_store.match_data = history
+    if indexes is None:
+        return
+    fresh_index, fresh_totals, snapshot_path = indexes
+    if current:
+        mapped = getattr(search_index, "snapshot_map", None)
+        search_index, totals_store = fresh_index, fresh_totals
+        search_cache.clear()
+        lineup_index = None
+        trend_store = None
+        leaderboards = None
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+    else:
+        # Keep the newer in-memory indexes, but stop mapping the snapshot so it can be replaced
+        release_snapshot(search_index)
+    try:
+        os.replace(snapshot_path, snapshot_path_for(json_file_path))
+    except OSError as e:
+        print(f"Failed to write snapshot: {e}")
+
+def on_export_uploaded(success, error):
+    if success:
+        messagebox.showinfo("Success", f"Exported successfully to Google Drive.")
+        return
+    if isinstance(error, SyncConflict):
+        # Another machine uploaded since our last sync: merge its matches in, then upload again
+        set_sync_status(f"{error} Merging the remote copy...")
+        sync_worker.download(error.remote_name, remote_file_path, on_done=on_remote_downloaded)
+        return
+    print(f"Failed to upload file to Google Drive: {error}")
+    try:
+        shutil.copyfile(json_file_path, backup_file_path)
+        messagebox.showinfo("Success", f"Exported successfully to backup_cod_ireland_stats.json as a backup.")
+    except Exception as e:
+        print(f"Error in export_data: {e}")
+        messagebox.showerror("Error", f"Failed to save file: {e}")
 
 # Utility Functions
 
@@ -260,24 +459,9 @@ def update_checkbox_color():
 
 def update_objective_options(event):
     game_mode = mode_var.get()
-    objective = {
-        "Hardpoint": "Time on Hill",
-        "Control": "Captures",
-        "Search and Destroy": "Plants"
-    }.get(game_mode, "N/A")
+    objective = mode_objectives.get(game_mode, "N/A")
     objective_label.config(text=objective)
 
-def seconds_to_mmss(seconds):
-    minutes, seconds = divmod(int(seconds), 60)
-    return f"{minutes:02d}:{seconds:02d}"
-
-def mmss_to_seconds(mmss):
-    if ':' in mmss:
-        minutes, seconds = map(int, mmss.split(':'))
-        return minutes * 60 + seconds
-    else:
-        return int(mmss)
-
 def clear_player_inputs():
     for _, player_var, kills_entry, deaths_entry, obj_entry in player_widgets:
         player_var.set("")
@@ -292,7 +476,7 @@ def clear_all_inputs():
 
 def clear_all_series_data():
     global current_series
-    current_series = {"Series Number": current_series["Series Number"] + 1, "Matches": []}
+    current_series = new_series(current_series["Series Number"] + 1)
 
 # GUI Functions
 
@@ -335,27 +519,30 @@ def create_search_tab(notebook):
             "Search and Destroy": ["Plants"]
         }.get(game_mode, [])
 
-    search_mode_menu.bind("<<ComboboxSelected>>", update_search_objective_options)
+    def on_search_mode_selected(event):
+        update_search_objective_options(event)
+        schedule_search()
+
+    search_mode_menu.bind("<<ComboboxSelected>>", on_search_mode_selected)
 
     tree_frame = ttk.Frame(search_tab)
     tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-    tree = ttk.Treeview(tree_frame, columns=("K/D", "Match", "Player", "Kills", "Deaths", "OBJ", "Map", "Mode", "Result"), show="headings")
+    tree = VirtualGrid(tree_frame, columns=("K/D", "Match", "Player", "Kills", "Deaths", "OBJ", "Map", "Mode", "Result"))
 
-    for col in ("K/D", "Match", "Player", "Kills", "Deaths", "OBJ", "Map", "Mode", "Result"):
-        tree.heading(col, text=col, command=lambda _col=col: treeview_sort_column(tree, _col, False))
+    tree.enable_sorting()
 
-    for col in tree["columns"]:
+    for col in tree.columns:
         tree.column(col, width=70)
 
     tree.column("K/D", width=30, stretch=tk.NO)
 
     tree.pack(fill="both", expand=True)
 
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    scrollbar.pack(side="right", fill="y")
-    tree.configure(yscrollcommand=scrollbar.set)
+    tree.tag_configure("win", background="#00FF00")
+    tree.tag_configure("loss", background="#FF0000")
 
+    @timed("search_stats", rows=lambda _: len(tree.rows))
     def search_stats():
         player_filter = player_var.get()
         map_filter = map_var.get()
@@ -363,75 +550,50 @@ def create_search_tab(notebook):
         objective_filter = search_objective_var.get()
         result_filter = result_var.get()
 
-        for item in tree.get_children():
-            tree.delete(item)
-
-        for series in match_data:
-            for match in series["Matches"]:
-                if (player_filter and player_filter not in [stat["Player"] for stat in match["Player Stats"]]) or \
-                (map_filter and match["Map"] != map_filter) or \
-                (mode_filter and match["Game Mode"] != mode_filter) or \
-                (result_filter and match["Result"] != result_filter) or \
-                (objective_filter and "OBJ" in match and not any(stat["OBJ"] == objective_filter or (match["Game Mode"] == "Hardpoint" and str(mmss_to_seconds(stat["OBJ"])) == objective_filter) for stat in match["Player Stats"])): 
-                    continue
-
-                for stat in match["Player Stats"]:
-                    if (not player_filter or stat["Player"] == player_filter) and \
-                    (not objective_filter or "OBJ" in match and (stat["OBJ"] == objective_filter or (match["Game Mode"] == "Hardpoint" and str(mmss_to_seconds(stat["OBJ"])) == objective_filter))):
-                        kd_indicator = '+' if stat["Kills"] > stat["Deaths"] else '-' if stat["Kills"] < stat["Deaths"] else '='
-                        tree.insert("", "end", values=(
-                            kd_indicator,
-                            match["Match Number"],
-                            stat["Player"],
-                            stat["Kills"],
-                            stat["Deaths"],
-                            stat["OBJ"] if match["Game Mode"] != "Hardpoint" else seconds_to_mmss(stat["OBJ"]), 
-                            match["Map"],
-                            match["Game Mode"],
-                            match["Result"]
-                        ))
-                for item in tree.get_children():
-                    result_value = tree.item(item)['values'][-1]
-                if result_value == 'Win':
-                    tree.item(item, tags=('win',))
-                elif result_value == 'Loss':
-                    tree.item(item, tags=('loss',))
-
-                tree.tag_configure("win", background="#00FF00")
-                tree.tag_configure("loss", background="#FF0000")
+        rows = []
+        row_tags = []
+        sort_rows = []
+        for match, stat in search_results(player_filter, map_filter, mode_filter, objective_filter, result_filter):
+            result_value = match.get("Result")
+            rows.append(search_row(match, stat))
+            sort_rows.append(search_sort_row(match, stat))
+            row_tags.append(('win',) if result_value == 'Win' else ('loss',) if result_value == 'Loss' else ())
+        tree.set_rows(rows, row_tags, sort_rows)
 
     ttk.Button(search_frame, text="Search", command=search_stats).grid(row=3, column=3, columnspan=2, pady=5)
 
+    # Search as filters change, once the user pauses for search_debounce_ms
+    pending_search = None
+
+    def schedule_search(event=None):
+        nonlocal pending_search
+        if pending_search is not None:
+            tree.after_cancel(pending_search)
+        pending_search = tree.after(search_debounce_ms, run_pending_search)
+
+    def run_pending_search():
+        nonlocal pending_search
+        pending_search = None
+        search_stats()
+
+    for combobox in (player_var, map_var, search_objective_menu, result_var):
+        combobox.bind("<<ComboboxSelected>>", schedule_search)
+
     def clear_filters():
+        nonlocal pending_search
+        if pending_search is not None:
+            tree.after_cancel(pending_search)
+            pending_search = None
         player_var.set("")
         map_var.set("")
         search_mode_var.set("")
         search_objective_var.set("")
         result_var.set("")
         
-        for item in tree.get_children():
-            tree.delete(item)
+        tree.clear()
 
     ttk.Button(search_frame, text="Clear Filters", command=clear_filters).grid(row=3, column=0, columnspan=4, pady=5)
 
-    def treeview_sort_column(tv, col, reverse):
-        l = [(tv.set(k, col), k) for k in tv.get_children('')]
-        try:
-            l.sort(key=lambda t: int(t[0]), reverse=reverse)
-        except ValueError:
-            l.sort(reverse=reverse)
-
-        for index, (val, k) in enumerate(l):
-            tv.move(k, '', index)
-
-        tv.heading(col, command=lambda: treeview_sort_column(tv, col, not reverse))
-
-        for header in tv["columns"]:
-            if header == col:
-                tv.heading(header, text=f"{header} {'▼' if reverse else '▲'}")
-            else:
-                tv.heading(header, text=header)
-
 def create_totals_tab(notebook):
     totals_tab = ttk.Frame(notebook)
     notebook.add(totals_tab, text="Totals")
@@ -439,164 +601,216 @@ def create_totals_tab(notebook):
     tree_frame = ttk.Frame(totals_tab)
     tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-    tree = ttk.Treeview(tree_frame, columns=("Player", "Total Kills", "Total Deaths", "Time on Hill", "Captures", "Plants", "K/D Ratio"), show="headings")
-    
-    for col in ("Player", "Total Kills", "Total Deaths", "Time on Hill", "Captures", "Plants", "K/D Ratio"):
-        tree.heading(col, text=col, command=lambda _col=col: treeview_sort_column(tree, _col, False))
+    tree = VirtualGrid(tree_frame, columns=("Player", "Total Kills", "Total Deaths", "Time on Hill", "Captures", "Plants", "K/D Ratio"))
+    tree.enable_sorting()
+
+    for col in tree.columns:
         tree.column(col, width=100, anchor="center")
 
     tree.pack(fill="both", expand=True)
 
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    scrollbar.pack(side="right", fill="y")
-    tree.configure(yscrollcommand=scrollbar.set)
-
+    @timed("update_totals", rows=lambda _: len(tree.rows))
     def update_totals():
-        for item in tree.get_children():
-            tree.delete(item)
-
-        player_totals = {}
-        for series in match_data:
-            for match in series["Matches"]:
-                for stat in match["Player Stats"]:
-                    player = stat["Player"]
-                    if player not in player_totals:
-                        player_totals[player] = {
-                            "kills": 0, 
-                            "deaths": 0, 
-                            "time_on_hill": 0, 
-                            "captures": 0, 
-                            "plants": 0
-                        }
-                    
-                    player_totals[player]["kills"] += stat["Kills"]
-                    player_totals[player]["deaths"] += stat["Deaths"]
-                    
-                    if match["Game Mode"] == "Hardpoint":
-                        if isinstance(stat["OBJ"], str):
-                            player_totals[player]["time_on_hill"] += mmss_to_seconds(stat["OBJ"])
-                        else:
-                            player_totals[player]["time_on_hill"] += stat["OBJ"]
-                    elif match["Game Mode"] == "Control":
-                        player_totals[player]["captures"] += int(stat["OBJ"])
-                    elif match["Game Mode"] == "Search and Destroy":
-                        player_totals[player]["plants"] += int(stat["OBJ"])
-
-        for player, totals in player_totals.items():
-            kd_ratio = totals["kills"] / totals["deaths"] if totals["deaths"] != 0 else totals["kills"]
-            time_on_hill = seconds_to_mmss(totals["time_on_hill"])
-            
-            tree.insert("", "end", values=(
-                player,
-                totals["kills"],
-                totals["deaths"],
-                time_on_hill,
-                totals["captures"],
-                totals["plants"],
-                f"{kd_ratio:.2f}"
-            ))
+        player_totals = current_player_totals()
+        tree.set_rows(totals_rows(player_totals), sort_rows=totals_sort_rows(player_totals))
 
     update_button = ttk.Button(totals_tab, text="Update Totals", command=update_totals)
     update_button.pack(pady=10)
 
-    def treeview_sort_column(tv, col, reverse):
-        l = [(tv.set(k, col), k) for k in tv.get_children('')]
-        try:
-            if col == "K/D Ratio":
-                l.sort(key=lambda t: float(t[0]), reverse=reverse)
-            elif col == "Time on Hill":
-                l.sort(key=lambda t: mmss_to_seconds(t[0]), reverse=reverse)
-            else:
-                l.sort(key=lambda t: int(t[0]), reverse=reverse)
-        except ValueError:
-            l.sort(reverse=reverse)
-
-        for index, (val, k) in enumerate(l):
-            tv.move(k, '', index)
-
-        tv.heading(col, command=lambda: treeview_sort_column(tv, col, not reverse))
-
-        for header in tv["columns"]:
-            if header == col:
-                tv.heading(header, text=f"{header} {'▼' if reverse else '▲'}")
-            else:
-                tv.heading(header, text=header)
+def create_lineups_tab(notebook):
+    lineups_tab = ttk.Frame(notebook)
+    notebook.add(lineups_tab, text="Lineups")
+
+    filter_frame = ttk.LabelFrame(lineups_tab, text="Lineup Filters", padding=10)
+    filter_frame.pack(fill="x", padx=10, pady=5)
+
+    ttk.Label(filter_frame, text="Map:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    map_var = ttk.Combobox(filter_frame, values=[""] + maps, state="readonly")
+    map_var.grid(row=0, column=1, padx=5, pady=5)
+
+    ttk.Label(filter_frame, text="Game Mode:").grid(row=0, column=2, padx=5, pady=5, sticky="w")
+    mode_var = ttk.Combobox(filter_frame, values=[""] + game_modes, state="readonly")
+    mode_var.grid(row=0, column=3, padx=5, pady=5)
+
+    ttk.Label(filter_frame, text="Players:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    size_var = ttk.Combobox(filter_frame, values=["4", "2"], state="readonly")
+    size_var.set("4")
+    size_var.grid(row=1, column=1, padx=5, pady=5)
+
+    tree_frame = ttk.Frame(lineups_tab)
+    tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+    tree = VirtualGrid(tree_frame, columns=("Lineup", "Matches", "Wins", "Losses", "Win Rate", "K/D"))
+    tree.enable_sorting()
+    tree.column("Lineup", width=250)
+    tree.pack(fill="both", expand=True)
+
+    def show_lineups():
+        ranked = get_lineup_index().best(map_var.get(), mode_var.get(), size=int(size_var.get()), limit=50)
+        tree.set_rows(lineup_rows(ranked), sort_rows=lineup_sort_rows(ranked))
+
+    ttk.Button(filter_frame, text="Best Lineups", command=show_lineups).grid(row=1, column=3, pady=5)
+
+def create_trends_tab(notebook):
+    trends_tab = ttk.Frame(notebook)
+    notebook.add(trends_tab, text="Trends")
+
+    filter_frame = ttk.LabelFrame(trends_tab, text="Recent Form", padding=10)
+    filter_frame.pack(fill="x", padx=10, pady=5)
+
+    ttk.Label(filter_frame, text="Last:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    window_var = ttk.Combobox(filter_frame, values=["5", "10", "20", "50"], state="readonly", width=5)
+    window_var.set(str(default_window))
+    window_var.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+    unit_var = ttk.Combobox(filter_frame, values=["Matches", "Series"], state="readonly", width=10)
+    unit_var.set("Matches")
+    unit_var.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+
+    ttk.Label(filter_frame, text="Map:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    map_var = ttk.Combobox(filter_frame, values=[""] + maps, state="readonly")
+    map_var.grid(row=1, column=1, padx=5, pady=5)
+
+    ttk.Label(filter_frame, text="Game Mode:").grid(row=1, column=2, padx=5, pady=5, sticky="w")
+    mode_var = ttk.Combobox(filter_frame, values=[""] + game_modes, state="readonly")
+    mode_var.grid(row=1, column=3, padx=5, pady=5)
+
+    tree_frame = ttk.Frame(trends_tab)
+    tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+    tree = VirtualGrid(tree_frame, columns=("Player", "Games", "K/D", "Win Rate", "Time on Hill/Game", "Captures/Game", "Plants/Game"))
+    tree.enable_sorting()
+    tree.pack(fill="both", expand=True)
+
+    def show_trends():
+        store = get_trend_store(int(window_var.get()))
+        player_trends = store.player_trends(map_var.get(), mode_var.get(), per_series=unit_var.get() == "Series")
+        tree.set_rows(trend_rows(player_trends), sort_rows=trend_sort_rows(player_trends))
+
+    ttk.Button(filter_frame, text="Update Trends", command=show_trends).grid(row=0, column=3, pady=5)
+
+def create_leaderboards_tab(notebook):
+    leaderboards_tab = ttk.Frame(notebook)
+    notebook.add(leaderboards_tab, text="Leaderboards")
+
+    filter_frame = ttk.LabelFrame(leaderboards_tab, text="Leaderboard Filters", padding=10)
+    filter_frame.pack(fill="x", padx=10, pady=5)
+
+    ttk.Label(filter_frame, text="Map:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    map_var = ttk.Combobox(filter_frame, values=[""] + maps, state="readonly")
+    map_var.grid(row=0, column=1, padx=5, pady=5)
+
+    ttk.Label(filter_frame, text="Game Mode:").grid(row=0, column=2, padx=5, pady=5, sticky="w")
+    mode_var = ttk.Combobox(filter_frame, values=[""] + game_modes, state="readonly")
+    mode_var.grid(row=0, column=3, padx=5, pady=5)
+
+    tree_frame = ttk.Frame(leaderboards_tab)
+    tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+    tree = VirtualGrid(tree_frame, columns=("Board", "Rank", "Player", "Value", "Record"))
+    for col in tree.columns:
+        tree.heading(col, text=col)
+    tree.column("Rank", width=40)
+    tree.column("Record", width=250)
+    tree.pack(fill="both", expand=True)
+
+    def show_leaderboards():
+        tree.set_rows(leaderboard_rows(get_leaderboards(), map_var.get(), mode_var.get()))
+
+    ttk.Button(filter_frame, text="Show Leaderboards", command=show_leaderboards).grid(row=1, column=3, pady=5)
 
 def create_charts_tab(notebook):
+    global chart_panel
     charts_tab = ttk.Frame(notebook)
     notebook.add(charts_tab, text="Charts")
 
     ttk.Label(charts_tab, text="Select Chart Type:").pack(pady=10)
     
     chart_type_var = tk.StringVar()
-    chart_type_menu = ttk.Combobox(charts_tab, textvariable=chart_type_var, values=["Kills vs Deaths", "Objectives"], state="readonly")
+    chart_type_menu = ttk.Combobox(charts_tab, textvariable=chart_type_var, values=chart_types, state="readonly")
     chart_type_menu.pack(pady=10)
     
     chart_frame = ttk.Frame(charts_tab)
     chart_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-    def plot_chart():
-        for widget in chart_frame.winfo_children():
-            widget.destroy()
+    chart_panel = ChartPanel(chart_frame)
 
+    def plot_chart():
         chart_type = chart_type_var.get()
-        if chart_type == "Kills vs Deaths":
-            plot_kills_vs_deaths(chart_frame)
-        elif chart_type == "Objectives":
-            plot_objectives(chart_frame)
+        if chart_type in trend_chart_plotters:
+            chart_panel.plot(chart_type, get_trend_store().player_trends())
+        else:
+            chart_panel.plot(chart_type, current_player_totals())
 
     ttk.Button(charts_tab, text="Plot Chart", command=plot_chart).pack(pady=10)
 
-def plot_kills_vs_deaths(frame):
-    players = []
-    kills = []
-    deaths = []
-
-    for series in match_data:
-        for match in series["Matches"]:
-            for stat in match["Player Stats"]:
-                players.append(stat["Player"])
-                kills.append(stat["Kills"])
-                deaths.append(stat["Deaths"])
-
-    fig, ax = plt.subplots()
-    ax.bar(players, kills, label='Kills')
-    ax.bar(players, deaths, label='Deaths', bottom=kills)
-    ax.set_xlabel('Players')
-    ax.set_ylabel('Count')
-    ax.set_title('Kills vs Deaths')
-    ax.legend()
-    canvas = FigureCanvasTkAgg(fig, master=frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill="both", expand=True)
-
-def plot_objectives(frame):
-    players = []
-    objectives = []
-
-    for series in match_data:
-        for match in series["Matches"]:
-            for stat in match["Player Stats"]:
-                players.append(stat["Player"])
-                objectives.append(stat["OBJ"])
-
-    fig, ax = plt.subplots()
-    ax.bar(players, objectives)
-    ax.set_xlabel('Players')
-    ax.set_ylabel('Objectives')
-    ax.set_title('Objectives by Player')
-
-    canvas = FigureCanvasTkAgg(fig, master=frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill="both", expand=True)
+def create_diagnostics_tab(notebook):
+    diagnostics_tab = ttk.Frame(notebook)
+    notebook.add(diagnostics_tab, text="Diagnostics")
+
+    control_frame = ttk.LabelFrame(diagnostics_tab, text="Timings", padding=10)
+    control_frame.pack(fill="x", padx=10, pady=5)
+
+    recording_var = tk.BooleanVar(value=diagnostics_enabled())
+    ttk.Checkbutton(control_frame, text="Record timings", variable=recording_var,
+                    command=lambda: enable_diagnostics(recording_var.get())).grid(row=0, column=0, padx=5, pady=5, sticky="w")
+
+    tree_frame = ttk.Frame(diagnostics_tab)
+    tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+    tree = VirtualGrid(tree_frame, columns=diagnostics_columns)
+    tree.enable_sorting()
+    for col in tree.columns:
+        tree.column(col, width=60, anchor="center")
+    tree.column("Operation", width=150, anchor="w")
+    tree.column("Histogram", width=250, anchor="w")
+    tree.pack(fill="both", expand=True)
+
+    def refresh_timings(event=None):
+        if notebook.select() == str(diagnostics_tab):
+            profile_button.config(text="Stop Profile and Save..." if profiling() else "Start Profile")
+            tree.set_rows(diagnostics_rows())
+
+    def clear_timings():
+        reset_diagnostics()
+        tree.clear()
+
+    def toggle_profile():
+        if not profiling():
+            start_profile()
+            profile_button.config(text="Stop Profile and Save...")
+            set_sync_status("Profiling the app; stop to save the profile.")
+            return
+        path = filedialog.asksaveasfilename(title="Save profile", initialfile=default_profile_path,
+                                            defaultextension=".prof", filetypes=[("cProfile data", "*.prof")])
+        if not path:
+            return
+        stop_profile(path)
+        profile_button.config(text="Start Profile")
+        set_sync_status(f"Profile written to {path}.")
+
+    ttk.Button(control_frame, text="Refresh", command=refresh_timings).grid(row=0, column=1, padx=5, pady=5)
+    ttk.Button(control_frame, text="Reset", command=clear_timings).grid(row=0, column=2, padx=5, pady=5)
+    profile_button = ttk.Button(control_frame, text="Start Profile", command=toggle_profile)
+    profile_button.grid(row=0, column=3, padx=5, pady=5)
+
+    notebook.bind("<<NotebookTabChanged>>", refresh_timings, add="+")
+
+def update_diagnostics_status(interval=2000):
+    """Show the operations taking the most time in the status bar while timings are recorded."""
+    summary = slowest() if diagnostics_enabled() else ""
+    diagnostics_var.set(f"Slowest: {summary}" if summary else "")
+    root.after(interval, update_diagnostics_status, interval)
 
 def create_splash_background(root):
     image_path = "Resources/stormlogo.png"
     try:
+        from PIL import ImageTk, Image
         image = Image.open(image_path)
         photo = ImageTk.PhotoImage(image)
         canvas = tk.Canvas(root, width=image.width, height=image.height, bg="black")
-        canvas.pack(fill="both", expand=True)
+        # Drawn after the first idle event, so take the top slot the widgets packed since would have left it
+        packed = root.pack_slaves()
+        canvas.pack(fill="both", expand=True, **({"before": packed[0]} if packed else {}))
         canvas.create_image(0, 0, image=photo, anchor="nw")
         canvas.image = photo
     except Exception as e:
@@ -616,11 +830,17 @@ root.resizable(True, True)
 win_var = tk.BooleanVar()
 lose_var = tk.BooleanVar()
 
-create_splash_background(root)
-
 root.grid_rowconfigure(0, weight=1)
 root.grid_columnconfigure(0, weight=1)
 
+status_frame = ttk.Frame(root)
+status_frame.pack(side="bottom", fill="x", padx=5)
+status_var = tk.StringVar()
+ttk.Label(status_frame, textvariable=status_var).pack(side="left")
+ttk.Button(status_frame, text="Cancel Sync", command=cancel_sync).pack(side="right")
+diagnostics_var = tk.StringVar()
+ttk.Label(status_frame, textvariable=diagnostics_var).pack(side="right", padx=10)
+
 notebook = ttk.Notebook(root)
 notebook.pack(expand=True, fill="both", padx=5, pady=5)
 
@@ -639,7 +859,11 @@ for i in range(16):
 
 create_search_tab(notebook)
 create_totals_tab(notebook)
+create_lineups_tab(notebook)
+create_trends_tab(notebook)
+create_leaderboards_tab(notebook)
 create_charts_tab(notebook)
+create_diagnostics_tab(notebook)
 
 
 mode_var = tk.StringVar()
@@ -728,14 +952,53 @@ export_button = ttk.Button(frame, text="Export Data", command=export_data)
 export_button.grid(row=14, column=2, columnspan=2, padx=5, pady=5)
 export_button.config(cursor="hand2")
 
+bulk_import_hint = ttk.Label(frame, text="Merge a folder of stats files into the file.")
+bulk_import_hint.grid(row=15, column=0, columnspan=2, padx=5, pady=5, sticky=tk.E)
+
+bulk_import_button = ttk.Button(frame, text="Bulk Import", command=bulk_import_data)
+bulk_import_button.grid(row=15, column=2, columnspan=2, padx=5, pady=5)
+bulk_import_button.config(cursor="hand2")
+
 # Main Function
 
+def report_startup_time():
+    elapsed_ms = (time.perf_counter() - _start_time) * 1000
+    print(f"Cold start: {elapsed_ms:.0f} ms to first idle event")
+
+def on_close():
+    if profiling():
+        print(f"Profile written to {stop_profile(os.environ.get('COD_STATS_PROFILE') or default_profile_path)}")
+    if checkpointer is not None and not checkpointer.stop(timeout=10):
+        messagebox.showerror("Error", "Some saved matches could not be written to disk.")
+    if sync_worker is not None:
+        sync_worker.stop()
+    if chart_panel is not None:
+        chart_panel.close()
+    root.destroy()
+
 def main():
+    global sync_worker, checkpointer
     root.title("CoD Stats Tracker")
     
-    create_splash_background(root)
-    import_data()
+    sync_worker = SyncWorker(make_sync_transport(), on_progress=set_sync_status)
+    sync_worker.attach(root)
+    checkpointer = Checkpointer(on_progress=set_sync_status, on_compacted=on_checkpoint_compacted,
+                                compression=storage_compression, build_indexes=use_snapshot())
+    checkpointer.attach(root)
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    update_diagnostics_status()
+    if os.environ.get("COD_STATS_PROFILE"):
+        start_profile()
+
+    if not os.path.exists(json_file_path):
+        sync_worker.download("cod_ireland_stats.json", json_file_path + ".download", on_done=on_initial_download)
+    init_data_file()
+    load_init_data()
+    root.title("CoD Stats Tracker")
 
+    root.after_idle(report_startup_time)
+    # PIL is only imported here, off the cold-start path
+    root.after_idle(create_splash_background, root)
     root.mainloop()
 
 if __name__ == "__main__":
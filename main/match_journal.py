@@ -0,0 +1,125 @@
+"""
+Append-only JSON Lines journal of saved series.
+
+Each saved series is one line written with a single append, so saving costs
+the size of the new record rather than the whole history. The journal is
+periodically compacted into the snapshot (the regular stats JSON file) and
+truncated. A torn last line from a crash mid-write is ignored on replay.
+
+Replay does not trust series numbers alone: a record numbered at or below the
+history's last series is kept unless all of its matches are already in the
+history (by match_hash), and then renumbered to follow it. That covers both a
+crash between the rewrite and the journal delete, and a round saved while a
+merge was renumbering the history underneath it.
+"""
+import os
+import json
+
+from stats_core import json_file_path, load_stats_file, write_stats_file, validate_stats, file_format_series, match_hash
+
+journal_file_path = "cod_ireland_stats.journal.jsonl"
+compact_every = 50
+
+def append_series(series, journal_path=journal_file_path):
+    append_series_batch([series], journal_path)
+
+def append_series_batch(series_list, journal_path=journal_file_path):
+    """Journal several series with one write and one fsync (a group commit)."""
+    data = "".join(json.dumps(file_format_series(series), separators=(",", ":")) + "\n" for series in series_list).encode("utf-8")
+    fd = os.open(journal_path, os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        # Start on a fresh line if a previous write was torn by a crash
+        size = os.fstat(fd).st_size
+        if size:
+            os.lseek(fd, size - 1, os.SEEK_SET)
+            if os.read(fd, 1) != b"\n":
+                data = b"\n" + data
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def read_journal(journal_path=journal_file_path):
+    records = []
+    if not os.path.exists(journal_path):
+        return records
+    with open(journal_path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Ignoring unreadable journal record at {journal_path}:{line_number}")
+    return validate_stats(records)
+
+def journal_length(journal_path=journal_file_path):
+    if not os.path.exists(journal_path):
+        return 0
+    with open(journal_path, "rb") as file:
+        return sum(1 for line in file if line.strip())
+
+def renumbered(series, series_number):
+    return dict(series, **{"Series Number": series_number})
+
+def unreplayed_series(records, last_series, history):
+    """
+    Yield the journal records missing from history, numbered to follow
+    last_series. history (an iterable of series) is only read if a record
+    is numbered at or below last_series.
+    """
+    seen = None
+    for series in records:
+        if series["Series Number"] <= last_series:
+            if seen is None:
+                seen = {match_hash(match) for old in history for match in old["Matches"]}
+            if all(match_hash(match) in seen for match in series["Matches"]):
+                continue
+            series = renumbered(series, last_series + 1)
+        last_series = series["Series Number"]
+        yield series
+
+def replay_journal(match_data, journal_path=journal_file_path):
+    """Append journalled series that are not in the snapshot yet to match_data."""
+    last_series = match_data[-1]["Series Number"] if match_data else 0
+    match_data.extend(list(unreplayed_series(read_journal(journal_path), last_series, match_data)))
+    return match_data
+
+def renumber_history(match_data):
+    """Renumber (copies of) series in place so series numbers strictly increase; returns the last number."""
+    last_series = 0
+    for position, series in enumerate(match_data):
+        if series["Series Number"] <= last_series:
+            match_data[position] = series = renumbered(series, last_series + 1)
+        last_series = series["Series Number"]
+    return last_series
+
+def load_with_journal(file_path=json_file_path, journal_path=journal_file_path, progress=None):
+    return replay_journal(load_stats_file(file_path, progress), journal_path)
+
+def fsync_directory(path):
+    """Make a rename in path's directory durable; a no-op where directories cannot be opened."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def compact(match_data, file_path=json_file_path, journal_path=journal_file_path, compression=None):
+    """Write match_data as the new snapshot, then drop the journal it covers."""
+    temp_path = file_path + ".tmp"
+    write_stats_file(match_data, temp_path, compression)
+    with open(temp_path, "rb+") as file:
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+    fsync_directory(file_path)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+def needs_compaction(journal_path=journal_file_path):
+    return journal_length(journal_path) >= compact_every
@@ -0,0 +1,77 @@
+"""
+LRU cache of search results for search-as-you-type.
+
+Results are cached by their filter tuple (player, map, mode, objective,
+result). When a search only adds filters to one already cached, for example
+a map after a player, the cached result is refined instead of asking the
+search source again. The cache must be cleared whenever the data changes.
+
+For a SearchIndex source only row IDs are cached, as 4-byte arrays, and
+refined against the ColumnarStore columns; the (match, stat) rows are built
+when a result is returned for display. Other sources (the SQLite store) only
+return rows, so those are cached as they are. Either way the cache is bounded
+by the total number of rows it holds as well as by entries, so a few broad
+searches on a large history cannot pin much memory.
+"""
+from array import array
+from collections import OrderedDict
+
+from stats_core import match_passes, stat_passes
+
+default_cache_size = 64
+default_max_rows = 250000
+
+def narrows(parent, key):
+    """True if key keeps every filter set in parent and adds at least one more."""
+    return parent != key and all(not old or old == new for old, new in zip(parent, key))
+
+class SearchCache:
+    def __init__(self, source, max_size=default_cache_size, max_rows=default_max_rows):
+        self.source = source
+        self.max_size = max_size
+        self.max_rows = max_rows
+        self.results = OrderedDict()
+        self.rows_held = 0
+        self.hits = 0
+        self.refinements = 0
+        self.misses = 0
+
+    def clear(self, source=None):
+        if source is not None:
+            self.source = source
+        self.results.clear()
+        self.rows_held = 0
+
+    def search(self, player_filter="", map_filter="", mode_filter="", objective_filter="", result_filter=""):
+        key = (player_filter, map_filter, mode_filter, objective_filter, result_filter)
+        by_id = hasattr(self.source, "search_ids")
+        results = self.results.get(key)
+        if results is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.source.rows(results) if by_id else results
+
+        parents = [parent for parent in self.results if narrows(parent, key)]
+        if parents:
+            self.refinements += 1
+            parent = self.results[min(parents, key=lambda parent: len(self.results[parent]))]
+            if by_id:
+                results = array("I", self.source.store.filter(*key, within=parent))
+            else:
+                results = [(match, stat) for match, stat in parent
+                           if match_passes(match, map_filter, mode_filter, result_filter) and
+                           stat_passes(match, stat, player_filter, objective_filter)]
+        else:
+            self.misses += 1
+            results = array("I", self.source.search_ids(*key)) if by_id else self.source.search(*key)
+
+        self._add(key, results)
+        return self.source.rows(results) if by_id else results
+
+    def _add(self, key, results):
+        self.results[key] = results
+        self.rows_held += len(results)
+        # Always keep the newest result, even one larger than max_rows on its own
+        while len(self.results) > 1 and (len(self.results) > self.max_size or self.rows_held > self.max_rows):
+            _, evicted = self.results.popitem(last=False)
+            self.rows_held -= len(evicted)
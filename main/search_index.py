@@ -0,0 +1,104 @@
+"""
+Search index over player stat rows for the Search Stats tab.
+
+Rows live in a ColumnarStore and are numbered in load order. When NumPy is
+installed a search is one vectorised ColumnarStore.filter pass over the code
+columns, and no inverted index is kept. Without NumPy each filter field maps
+its values to a posting list of the row IDs carrying that value, and a
+combined search intersects those lists as sets, starting from the smallest.
+Posting lists are append-only arrays of increasing row IDs, which keeps them
+compact and lets a snapshot store and map them directly.
+"""
+from array import array
+
+from stats_core import format_obj, objective_modes
+from columnar_store import ColumnarStore, np
+
+posting_fields = ("by_player", "by_map", "by_mode", "by_result", "by_obj")
+
+class SearchIndex:
+    use_postings = np is None
+
+    def __init__(self, match_data=None):
+        self.clear()
+        if match_data:
+            self.build(match_data)
+
+    def clear(self):
+        self.store = ColumnarStore()
+        for field in posting_fields:
+            setattr(self, field, {})
+
+    def build(self, match_data):
+        self.clear()
+        for series in match_data:
+            self.add_series(series)
+
+    def add_series(self, series):
+        self.store.start_series(series["Series Number"])
+        for match in series["Matches"]:
+            self.add_match(match)
+
+    def add_match(self, match):
+        game_mode = match["Game Mode"]
+        first_row = len(self.store)
+        self.store.add_match(match)
+        if not self.use_postings:
+            return
+        for row_id, stat in enumerate(match["Player Stats"], start=first_row):
+            self._post(self.by_player, stat["Player"], row_id)
+            self._post(self.by_map, match["Map"], row_id)
+            self._post(self.by_mode, game_mode, row_id)
+            self._post(self.by_result, match.get("Result", ""), row_id)
+            self._post(self.by_obj, str(stat["OBJ"]), row_id)
+            if game_mode == "Hardpoint":
+                self._post(self.by_obj, format_obj(game_mode, stat["OBJ"]), row_id)
+
+    def _post(self, postings, key, row_id):
+        ids = postings.get(key)
+        if ids is None:
+            ids = postings[key] = array("I")
+        elif not isinstance(ids, array):
+            # Posting lists mapped from a snapshot are read-only until first written
+            ids = postings[key] = array("I", ids)
+        ids.append(row_id)
+
+    def _objective_ids(self, objective_filter):
+        if objective_filter in objective_modes:
+            return self.by_mode.get(objective_modes[objective_filter], ())
+        return self.by_obj.get(objective_filter, ())
+
+    def search_ids(self, player_filter="", map_filter="", mode_filter="", objective_filter="", result_filter=""):
+        if not self.use_postings:
+            return self.store.filter(player_filter, map_filter, mode_filter, objective_filter, result_filter)
+
+        candidates = []
+        if player_filter:
+            candidates.append(self.by_player.get(player_filter, ()))
+        if map_filter:
+            candidates.append(self.by_map.get(map_filter, ()))
+        if mode_filter:
+            candidates.append(self.by_mode.get(mode_filter, ()))
+        if objective_filter:
+            candidates.append(self._objective_ids(objective_filter))
+        if result_filter:
+            candidates.append(self.by_result.get(result_filter, ()))
+
+        if not candidates:
+            return list(range(len(self.store)))
+
+        candidates.sort(key=len)
+        matching = set(candidates[0])
+        for ids in candidates[1:]:
+            if not matching:
+                break
+            matching.intersection_update(ids)
+        return sorted(matching)
+
+    def search(self, player_filter="", map_filter="", mode_filter="", objective_filter="", result_filter=""):
+        """Same result as stats_core.search_stats, answered from the index."""
+        return self.rows(self.search_ids(player_filter, map_filter, mode_filter, objective_filter, result_filter))
+
+    def rows(self, row_ids):
+        """(match, stat) pairs for row IDs, as stats_core.search_stats returns them."""
+        return [self.store.row(row_id) for row_id in row_ids]
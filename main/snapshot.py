@@ -0,0 +1,162 @@
+"""
+Binary snapshot cache of the normalised store and prebuilt indexes.
+
+The snapshot sits next to the stats JSON file and holds the ColumnarStore
+columns, the SearchIndex posting lists (when the index keeps them, i.e.
+without NumPy) and the TotalsStore aggregates. It is memory-mapped on load,
+so startup does not parse or rebuild anything in proportion to the history
+size. A snapshot is only used when it was written for the current contents
+of the JSON file (same size and mtime, or else the same SHA-256), by the same
+format version, on a machine with the same byte order and with posting lists
+if this index needs them; otherwise the caller rebuilds from JSON and writes
+a fresh one.
+
+Layout: magic, version (u32), metadata length (u32), JSON metadata, then the
+raw array data, each block aligned to 8 bytes.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+from array import array
+
+from stats_core import json_file_path
+from search_index import SearchIndex, posting_fields
+from totals_store import TotalsStore
+from columnar_store import Dictionary
+
+snapshot_magic = b"CODSNAP\0"
+snapshot_version = 1
+header_format = "<II"
+
+def snapshot_path_for(file_path=json_file_path):
+    return os.path.splitext(file_path)[0] + ".snapshot"
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_signature(file_path):
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(file_path)}
+
+def _source_matches(signature, file_path):
+    stat = os.stat(file_path)
+    if signature["size"] != stat.st_size:
+        return False
+    if signature["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return signature["sha256"] == file_sha256(file_path)
+
+def _align(size):
+    return (size + 7) & ~7
+
+def write_snapshot(search_index, totals_store, file_path=json_file_path, snapshot_path=None):
+    snapshot_path = snapshot_path or snapshot_path_for(file_path)
+    release_snapshot(search_index)
+    store = search_index.store
+    blobs = []
+    offset = 0
+
+    def add_block(column):
+        nonlocal offset
+        data = column.tobytes()
+        location = [offset, len(column)]
+        blobs.append(data + b"\0" * (_align(len(data)) - len(data)))
+        offset += _align(len(data))
+        return location
+
+    metadata = {
+        "byteorder": sys.byteorder,
+        "source": source_signature(file_path),
+        "columns": {name: add_block(column) for name, _, column in store.columns()},
+        "dictionaries": {name: getattr(store, name).values for name in ("players", "maps", "modes", "results")},
+        "postings": {field: {key: add_block(ids) for key, ids in getattr(search_index, field).items()} for field in posting_fields}
+                    if search_index.use_postings else None,
+        "totals": totals_store.to_state()
+    }
+    metadata_bytes = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    header = snapshot_magic + struct.pack(header_format, snapshot_version, len(metadata_bytes)) + metadata_bytes
+    header += b"\0" * (_align(len(header)) - len(header))
+
+    temp_path = snapshot_path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(header)
+        for blob in blobs:
+            file.write(blob)
+    os.replace(temp_path, snapshot_path)
+    return snapshot_path
+
+def read_snapshot(file_path=json_file_path, snapshot_path=None, verify_totals=False):
+    """Return (search_index, totals_store) from a valid snapshot, or None."""
+    snapshot_path = snapshot_path or snapshot_path_for(file_path)
+    if not os.path.exists(snapshot_path) or not os.path.exists(file_path):
+        return None
+
+    with open(snapshot_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < len(snapshot_magic) + struct.calcsize(header_format):
+            return None
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        prefix = len(snapshot_magic)
+        if mapped[:prefix] != snapshot_magic:
+            raise ValueError("not a snapshot")
+        version, metadata_length = struct.unpack_from(header_format, mapped, prefix)
+        if version != snapshot_version:
+            raise ValueError(f"snapshot version {version}")
+        metadata_start = prefix + struct.calcsize(header_format)
+        metadata = json.loads(mapped[metadata_start:metadata_start + metadata_length].decode("utf-8"))
+        if metadata["byteorder"] != sys.byteorder or not _source_matches(metadata["source"], file_path):
+            raise ValueError("stale snapshot")
+        if metadata["postings"] is None and SearchIndex.use_postings:
+            raise ValueError("snapshot written without posting lists")
+    except (ValueError, KeyError, struct.error):
+        mapped.close()
+        return None
+
+    data_start = _align(metadata_start + metadata_length)
+    view = memoryview(mapped)
+
+    def block(location, typecode):
+        start = data_start + location[0]
+        return view[start:start + location[1] * array(typecode).itemsize].cast(typecode)
+
+    search_index = SearchIndex()
+    store = search_index.store
+    for name, typecode, _ in store.columns():
+        setattr(store, name, block(metadata["columns"][name], typecode))
+    store.read_only = True
+    for name, values in metadata["dictionaries"].items():
+        setattr(store, name, Dictionary(values))
+    if search_index.use_postings:
+        for field in posting_fields:
+            setattr(search_index, field, {key: block(location, "I") for key, location in metadata["postings"][field].items()})
+    search_index.snapshot_map = mapped
+
+    totals_store = TotalsStore(verify=verify_totals)
+    totals_store.load_state(metadata["totals"])
+    return search_index, totals_store
+
+def release_snapshot(search_index):
+    """Copy any mapped data into memory and unmap the snapshot so it can be replaced."""
+    mapped = getattr(search_index, "snapshot_map", None)
+    if mapped is None:
+        return
+    search_index.store._make_writable()
+    for field in posting_fields:
+        postings = getattr(search_index, field)
+        for key, ids in postings.items():
+            if not isinstance(ids, array):
+                postings[key] = array("I", ids)
+    search_index.snapshot_map = None
+    try:
+        mapped.close()
+    except BufferError:
+        # Something still holds a view; the map is closed once that is collected
+        pass
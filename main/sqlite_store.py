@@ -0,0 +1,223 @@
+"""
+Optional SQLite storage backend.
+
+Series, matches and player stats live in three tables with indexes on player,
+map, game mode and result, and search/totals run as SQL. OBJ is stored once,
+as the integer count or Hardpoint seconds in obj_value; search formats it as
+mm:ss in SQL when needed. Any keys the app does not know about are kept
+alongside the typed columns so a database exports back to the same JSON it
+was migrated from.
+
+Select it with COD_STATS_BACKEND=sqlite; the database sits next to the JSON
+file. Run this module directly to migrate a JSON file by hand:
+
+    python main/sqlite_store.py cod_ireland_stats.json cod_ireland_stats.db
+"""
+import os
+import sys
+import json
+import sqlite3
+
+from stats_core import json_file_path, objective_modes, write_stats_file
+from match_journal import load_with_journal
+
+db_file_path = os.path.splitext(json_file_path)[0] + ".db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    series_number INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    series_id INTEGER NOT NULL REFERENCES series(id),
+    match_number INTEGER,
+    game_mode TEXT NOT NULL,
+    map TEXT NOT NULL,
+    result TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS player_stats (
+    id INTEGER PRIMARY KEY,
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    player TEXT NOT NULL,
+    kills INTEGER NOT NULL,
+    deaths INTEGER NOT NULL,
+    obj_value INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_matches_series ON matches(series_id);
+CREATE INDEX IF NOT EXISTS idx_matches_map ON matches(map);
+CREATE INDEX IF NOT EXISTS idx_matches_mode ON matches(game_mode);
+CREATE INDEX IF NOT EXISTS idx_matches_result ON matches(result);
+CREATE INDEX IF NOT EXISTS idx_stats_match ON player_stats(match_id);
+CREATE INDEX IF NOT EXISTS idx_stats_player ON player_stats(player);
+"""
+
+SERIES_KEYS = ("Series Number", "Matches")
+MATCH_KEYS = ("Game Mode", "Map", "Player Stats", "Match Number", "Result")
+STAT_KEYS = ("Player", "Kills", "Deaths", "OBJ")
+
+def _extra(record, known_keys):
+    extra = {key: value for key, value in record.items() if key not in known_keys}
+    return json.dumps(extra) if extra else None
+
+class SqliteStore:
+    def __init__(self, db_path=db_file_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def is_empty(self):
+        return self.connection.execute("SELECT COUNT(*) FROM series").fetchone()[0] == 0
+
+    # Writing
+
+    def _insert_series(self, series):
+        cursor = self.connection.execute(
+            "INSERT INTO series (series_number, extra) VALUES (?, ?)",
+            (series["Series Number"], _extra(series, SERIES_KEYS)))
+        series_id = cursor.lastrowid
+        for match in series["Matches"]:
+            cursor = self.connection.execute(
+                "INSERT INTO matches (series_id, match_number, game_mode, map, result, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                (series_id, match.get("Match Number"), match["Game Mode"], match["Map"], match.get("Result"),
+                 _extra(match, MATCH_KEYS)))
+            match_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO player_stats (match_id, player, kills, deaths, obj_value, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                [(match_id, stat["Player"], stat["Kills"], stat["Deaths"], stat["OBJ"], _extra(stat, STAT_KEYS))
+                 for stat in match["Player Stats"]])
+
+    def add_series(self, series):
+        with self.connection:
+            self._insert_series(series)
+
+    def replace_all(self, match_data):
+        with self.connection:
+            self.connection.execute("DELETE FROM player_stats")
+            self.connection.execute("DELETE FROM matches")
+            self.connection.execute("DELETE FROM series")
+            for series in match_data:
+                self._insert_series(series)
+
+    # Reading
+
+    def to_match_data(self):
+        match_data = []
+        series_by_id = {}
+        for series_id, series_number, extra in self.connection.execute(
+                "SELECT id, series_number, extra FROM series ORDER BY id"):
+            series = {"Series Number": series_number, "Matches": []}
+            if extra:
+                series.update(json.loads(extra))
+            series_by_id[series_id] = series
+            match_data.append(series)
+
+        matches_by_id = {}
+        for match_id, series_id, match_number, game_mode, map_name, result, extra in self.connection.execute(
+                "SELECT id, series_id, match_number, game_mode, map, result, extra FROM matches ORDER BY id"):
+            match = {"Game Mode": game_mode, "Map": map_name, "Player Stats": []}
+            if match_number is not None:
+                match["Match Number"] = match_number
+            if result is not None:
+                match["Result"] = result
+            if extra:
+                match.update(json.loads(extra))
+            matches_by_id[match_id] = match
+            series_by_id[series_id]["Matches"].append(match)
+
+        for match_id, player, kills, deaths, obj, extra in self.connection.execute(
+                "SELECT match_id, player, kills, deaths, obj_value, extra FROM player_stats ORDER BY id"):
+            stat = {"Player": player, "Kills": kills, "Deaths": deaths, "OBJ": obj}
+            if extra:
+                stat.update(json.loads(extra))
+            matches_by_id[match_id]["Player Stats"].append(stat)
+        return match_data
+
+    def export_json(self, file_path=json_file_path, compression=None):
+        write_stats_file(self.to_match_data(), file_path, compression)
+
+    def search(self, player_filter="", map_filter="", mode_filter="", objective_filter="", result_filter=""):
+        """Same (match, stat) pairs as stats_core.search_stats, answered with SQL."""
+        conditions = []
+        params = []
+        if player_filter:
+            conditions.append("p.player = ?")
+            params.append(player_filter)
+        if map_filter:
+            conditions.append("m.map = ?")
+            params.append(map_filter)
+        if mode_filter:
+            conditions.append("m.game_mode = ?")
+            params.append(mode_filter)
+        if result_filter:
+            conditions.append("m.result = ?")
+            params.append(result_filter)
+        if objective_filter in objective_modes:
+            conditions.append("m.game_mode = ?")
+            params.append(objective_modes[objective_filter])
+        elif objective_filter:
+            conditions.append(
+                "(CAST(p.obj_value AS TEXT) = ? OR "
+                "(m.game_mode = 'Hardpoint' AND printf('%02d:%02d', p.obj_value / 60, p.obj_value % 60) = ?))")
+            params.extend([objective_filter] * 2)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            "SELECT m.match_number, m.game_mode, m.map, m.result, p.player, p.kills, p.deaths, p.obj_value "
+            f"FROM player_stats p JOIN matches m ON m.id = p.match_id {where} ORDER BY p.id", params)
+
+        results = []
+        for match_number, game_mode, map_name, result, player, kills, deaths, obj in rows:
+            match = {"Game Mode": game_mode, "Map": map_name, "Match Number": match_number or "", "Result": result or ""}
+            stat = {"Player": player, "Kills": kills, "Deaths": deaths, "OBJ": obj}
+            results.append((match, stat))
+        return results
+
+    def player_totals(self):
+        """Per-player totals in the same shape as stats_core.compute_player_totals."""
+        rows = self.connection.execute("""
+            SELECT p.player,
+                   SUM(p.kills),
+                   SUM(p.deaths),
+                   SUM(CASE WHEN m.game_mode = 'Hardpoint' THEN p.obj_value ELSE 0 END),
+                   SUM(CASE WHEN m.game_mode = 'Control' THEN p.obj_value ELSE 0 END),
+                   SUM(CASE WHEN m.game_mode = 'Search and Destroy' THEN p.obj_value ELSE 0 END)
+            FROM player_stats p JOIN matches m ON m.id = p.match_id
+            GROUP BY p.player
+            ORDER BY MIN(p.id)
+        """)
+        return {
+            player: {"kills": kills, "deaths": deaths, "time_on_hill": time_on_hill, "captures": captures, "plants": plants}
+            for player, kills, deaths, time_on_hill, captures, plants in rows
+        }
+
+def migrate_json_to_sqlite(file_path=json_file_path, db_path=db_file_path):
+    """One-shot migration; raises ValueError if the database does not export back to the same data."""
+    match_data = load_with_journal(file_path)
+    store = SqliteStore(db_path)
+    store.replace_all(match_data)
+    if store.to_match_data() != match_data:
+        store.close()
+        raise ValueError(f"Migration of {file_path} to {db_path} did not round-trip.")
+    return store
+
+def open_store(file_path=json_file_path, db_path=db_file_path):
+    """Open the database, migrating from the JSON file the first time."""
+    if os.path.exists(db_path):
+        store = SqliteStore(db_path)
+        if not store.is_empty() or not os.path.exists(file_path):
+            return store
+        store.close()
+    return migrate_json_to_sqlite(file_path, db_path)
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else json_file_path
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".db"
+    migrate_json_to_sqlite(source, target).close()
+    print(f"Migrated {source} to {target}")
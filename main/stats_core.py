@@ -0,0 +1,443 @@
+"""
+Headless core for the stat tracker: data model, load/save, totals and search.
+
+Nothing in here touches Tk, Google Drive, matplotlib or PIL, and importing it
+has no side effects, so it can be used from scripts as well as the app.
+"""
+import io
+import os
+import re
+import gzip
+import json
+import hashlib
+
+from diagnostics import timed
+
+json_file_path = "cod_ireland_stats.json"
+backup_file_path = "backup_cod_ireland_stats.json"
+
+players = ["Bapper", "Jordy", "Stevo", "Varel", "Mixo", "Hok-Tuah"]
+maps = ["Vault", "Skyline", "Rewind", "Protocall", "Red Card"]
+game_modes = ["Hardpoint", "Control", "Search and Destroy"]
+objectives = ["Time on Hill", "Plants", "Captures"]
+
+mode_objectives = {
+    "Hardpoint": "Time on Hill",
+    "Control": "Captures",
+    "Search and Destroy": "Plants"
+}
+objective_modes = {objective: mode for mode, objective in mode_objectives.items()}
+
+# Data Model
+
+def new_series(series_number=1):
+    return {"Series Number": series_number, "Matches": []}
+
+def seconds_to_mmss(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def mmss_to_seconds(mmss):
+    if ':' in mmss:
+        minutes, seconds = map(int, mmss.split(':'))
+        return minutes * 60 + seconds
+    else:
+        return int(mmss)
+
+def obj_value(game_mode, obj):
+    """
+    Canonical integer value of an OBJ entry: seconds for Hardpoint, a count
+    otherwise. Applied once when data is loaded or entered; everything held in
+    memory after that already uses it.
+    """
+    if is_count(obj):
+        return obj
+    if not isinstance(obj, str):
+        raise TypeError(f"OBJ must be a whole number or a string, not {obj!r}")
+    match = (mmss_pattern if game_mode == "Hardpoint" else count_pattern).fullmatch(obj)
+    if match is None:
+        raise ValueError(f"Invalid OBJ {obj!r}")
+    return mmss_to_seconds(obj) if game_mode == "Hardpoint" else int(obj)
+
+mmss_pattern = re.compile(r"[0-9]+(:[0-9]+)?")
+count_pattern = re.compile(r"[0-9]+")
+
+def is_count(value):
+    """True for JSON integers; floats and booleans (bool subclasses int) are rejected rather than truncated."""
+    return type(value) is int
+
+def format_obj(game_mode, obj):
+    if game_mode == "Hardpoint":
+        return seconds_to_mmss(obj)
+    return str(obj)
+
+def file_format_series(series):
+    """Copy of a series with OBJ written the way stats files store it (m:ss for Hardpoint)."""
+    matches = []
+    for match in series["Matches"]:
+        if match["Game Mode"] == "Hardpoint":
+            match = dict(match, **{"Player Stats": [dict(stat, OBJ=seconds_to_mmss(stat["OBJ"])) for stat in match["Player Stats"]]})
+        matches.append(match)
+    return dict(series, Matches=matches)
+
+def kd_ratio(kills, deaths):
+    return kills / deaths if deaths != 0 else kills
+
+def kd_indicator(kills, deaths):
+    return '+' if kills > deaths else '-' if kills < deaths else '='
+
+def iter_stats(match_data):
+    for series in match_data:
+        for match in series["Matches"]:
+            for stat in match["Player Stats"]:
+                yield series, match, stat
+
+def match_hash(match):
+    """Identity of a match by content (mode, map, result and player stats), ignoring match and series numbers."""
+    content = {
+        "Game Mode": match["Game Mode"],
+        "Map": match["Map"],
+        "Result": match.get("Result", ""),
+        "Player Stats": sorted(([stat["Player"], stat["Kills"], stat["Deaths"], stat["OBJ"]] for stat in match["Player Stats"]))
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+# Load / Save
+
+class StatsValidationError(ValueError):
+    """Raised with every problem found in a stats file, not just the first."""
+    def __init__(self, errors):
+        self.errors = errors
+        shown = "\n".join(errors[:10])
+        more = f"\n...and {len(errors) - 10} more" if len(errors) > 10 else ""
+        super().__init__(f"{len(errors)} invalid record(s):\n{shown}{more}")
+
+def series_errors(series, location):
+    errors = []
+    if not isinstance(series, dict):
+        return [f"{location}: Invalid series structure in JSON data: {series}"]
+    if "Series Number" not in series or "Matches" not in series or not isinstance(series["Matches"], list):
+        return [f"{location}: Missing keys in series: {series}"]
+
+    for match_number, match in enumerate(series["Matches"], start=1):
+        match_location = f"{location}, match {match_number}"
+        if not isinstance(match, dict):
+            errors.append(f"{match_location}: Invalid match structure in JSON data: {match}")
+            continue
+        if "Game Mode" not in match or "Map" not in match or not isinstance(match.get("Player Stats"), list):
+            errors.append(f"{match_location}: Missing keys in match: {match}")
+            continue
+
+        for stat_number, player_stats in enumerate(match["Player Stats"], start=1):
+            stat_location = f"{match_location}, player stat {stat_number}"
+            if not isinstance(player_stats, dict):
+                errors.append(f"{stat_location}: Invalid player stats structure in JSON data: {player_stats}")
+                continue
+            if "Player" not in player_stats or "Kills" not in player_stats or "Deaths" not in player_stats or "OBJ" not in player_stats:
+                errors.append(f"{stat_location}: Missing keys in player stats: {player_stats}")
+                continue
+
+            # is_count, inlined since this runs for every stat in the file
+            if type(player_stats["Kills"]) is not int or type(player_stats["Deaths"]) is not int:
+                errors.append(f"{stat_location}: Invalid kills/deaths: {player_stats['Kills']}/{player_stats['Deaths']}")
+            try:
+                obj_value(match["Game Mode"], player_stats["OBJ"])
+            except (TypeError, ValueError):
+                errors.append(f"{stat_location}: Invalid OBJ format for {match['Game Mode']}: {player_stats['OBJ']}")
+    return errors
+
+def normalise_series(series):
+    for match in series["Matches"]:
+        for stat in match["Player Stats"]:
+            stat["OBJ"] = obj_value(match["Game Mode"], stat["OBJ"])
+    return series
+
+def validate_stats(data):
+    if not isinstance(data, list):
+        raise ValueError("Invalid data format: Expected a list of series data.")
+
+    errors = []
+    for index, series in enumerate(data):
+        errors.extend(series_errors(series, f"series {index + 1}"))
+    if errors:
+        raise StatsValidationError(errors)
+    for series in data:
+        normalise_series(series)
+    return data
+
+def init_data_file(file_path=json_file_path):
+    if not os.path.exists(file_path):
+        try:
+            with open(file_path, "w") as file:
+                json.dump([], file)
+        except Exception as e:
+            print(f"Failed to initialize data file: {e}")
+
+# Stats files are plain JSON, or compact JSON inside gzip or zstd; readers
+# tell them apart by their first bytes, so the file name never changes.
+compression_formats = ("gzip", "zstd")
+gzip_magic = b"\x1f\x8b"
+zstd_magic = b"\x28\xb5\x2f\xfd"
+
+def detect_compression(file_path):
+    """"gzip", "zstd" or None for plain JSON, from the file's magic number."""
+    with open(file_path, "rb") as file:
+        head = file.read(4)
+    if head.startswith(gzip_magic):
+        return "gzip"
+    if head == zstd_magic:
+        return "zstd"
+    return None
+
+def _zstd_module():
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ValueError("zstd stats files need Python 3.14 or the zstandard package (pip install zstandard).")
+
+def open_stats_file(file_path, mode="r", compression=None):
+    """
+    Open a stats file as text. For reading, compression is detected from the
+    file; for writing, None writes plain JSON.
+    """
+    if mode == "r":
+        compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, mode, encoding="utf-8")
+    if compression == "gzip":
+        if mode == "r":
+            return gzip.open(file_path, "rt", encoding="utf-8")
+        # mtime=0 keeps the header free of the write time, so identical data gives identical bytes (and MD5)
+        return io.TextIOWrapper(gzip.GzipFile(file_path, mode + "b", compresslevel=6, mtime=0), encoding="utf-8")
+    if compression == "zstd":
+        return _zstd_module().open(file_path, mode + "t", encoding="utf-8")
+    raise ValueError(f"Unknown compression {compression!r}; use {' or '.join(compression_formats)}.")
+
+def iter_json_array(file, chunk_size=65536):
+    """
+    Yield (line, element) for each element of a top-level JSON array without
+    reading the whole document into memory. Raises ValueError for anything
+    json.load would reject: missing, doubled or trailing commas, and content
+    after the closing bracket.
+    """
+    decoder = json.JSONDecoder()
+    skip_whitespace = re.compile(r"[ \t\r\n]*").match
+    value_delimiter = re.compile(r"[ \t\r\n,\]]").search
+    buffer = ""
+    position = 0
+    line = 1
+    eof = False
+    # "[" before the array, "value or ]" after "[", "value" after ",", ", or ]" after a value
+    expecting = "["
+
+    def more(size):
+        nonlocal buffer, position, eof
+        chunk = file.read(size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        start, position = position, skip_whitespace(buffer, position).end()
+        line += buffer.count("\n", start, position)
+        if position == len(buffer):
+            if eof:
+                if expecting == "done":
+                    return
+                raise json.JSONDecodeError("Unexpected end of file", "", 0)
+            more(chunk_size)
+            continue
+
+        char = buffer[position]
+        if expecting == "done":
+            raise ValueError(f"Line {line}: unexpected content after the closing ']'.")
+        if expecting == "[":
+            if char != "[":
+                raise ValueError("Invalid data format: Expected a list of series data.")
+            position += 1
+            expecting = "value or ]"
+            continue
+        if expecting == ", or ]":
+            if char == ",":
+                position += 1
+                expecting = "value"
+            elif char == "]":
+                position += 1
+                expecting = "done"
+            else:
+                raise ValueError(f"Line {line}: expected ',' or ']' after a series, found {char!r}.")
+            continue
+        if char == "]":
+            if expecting == "value":
+                raise ValueError(f"Line {line}: trailing comma before ']'.")
+            position += 1
+            expecting = "done"
+            continue
+        if char == ",":
+            raise ValueError(f"Line {line}: expected a series, found ','.")
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise json.JSONDecodeError(e.msg, e.doc, e.pos) from None
+            more(max(chunk_size, len(buffer) - position))
+            continue
+        if not eof and not value_delimiter(buffer, end):
+            # Until a delimiter follows, a number ("-2." of "-2.5e3") may continue in the next chunk
+            more(chunk_size)
+            continue
+        yield line, element
+        line += buffer.count("\n", position, end)
+        position = end
+        expecting = ", or ]"
+
+def stream_stats_file(file_path=json_file_path, progress=None, progress_every=500):
+    """
+    Validate and normalise a stats file one series at a time. Returns the
+    series list, or raises StatsValidationError listing every bad record with
+    its series index and line number.
+    """
+    match_data = []
+    errors = []
+    with open_stats_file(file_path) as file:
+        for index, (line, series) in enumerate(iter_json_array(file)):
+            series_problems = series_errors(series, f"series {index + 1} (line {line})")
+            if series_problems:
+                errors.extend(series_problems)
+            elif not errors:
+                match_data.append(normalise_series(series))
+            if progress and (index + 1) % progress_every == 0:
+                progress(index + 1)
+    if errors:
+        raise StatsValidationError(errors)
+    return match_data
+
+@timed("load_stats_file", rows=len)
+def load_stats_file(file_path=json_file_path, progress=None):
+    """Read and validate a stats file. Raises json.JSONDecodeError or ValueError."""
+    return stream_stats_file(file_path, progress)
+
+@timed("write_stats_file")
+def write_stats_file(match_data, file_path=json_file_path, compression=None):
+    """Plain indented JSON, or compact JSON compressed with "gzip" or "zstd"."""
+    series_list = [file_format_series(series) for series in match_data]
+    with open_stats_file(file_path, "w", compression) as file:
+        if compression is None:
+            json.dump(series_list, file, indent=4)
+        else:
+            json.dump(series_list, file, separators=(",", ":"))
+
+# Totals
+
+def new_player_totals():
+    return {
+        "kills": 0,
+        "deaths": 0,
+        "time_on_hill": 0,
+        "captures": 0,
+        "plants": 0
+    }
+
+def add_stat_to_totals(totals, game_mode, stat):
+    totals["kills"] += stat["Kills"]
+    totals["deaths"] += stat["Deaths"]
+
+    if game_mode == "Hardpoint":
+        totals["time_on_hill"] += stat["OBJ"]
+    elif game_mode == "Control":
+        totals["captures"] += stat["OBJ"]
+    elif game_mode == "Search and Destroy":
+        totals["plants"] += stat["OBJ"]
+
+def compute_player_totals(match_data):
+    player_totals = {}
+    for _, match, stat in iter_stats(match_data):
+        player = stat["Player"]
+        if player not in player_totals:
+            player_totals[player] = new_player_totals()
+        add_stat_to_totals(player_totals[player], match["Game Mode"], stat)
+    return player_totals
+
+def totals_rows(player_totals):
+    rows = []
+    for player, totals in player_totals.items():
+        rows.append((
+            player,
+            totals["kills"],
+            totals["deaths"],
+            seconds_to_mmss(totals["time_on_hill"]),
+            totals["captures"],
+            totals["plants"],
+            f"{kd_ratio(totals['kills'], totals['deaths']):.2f}"
+        ))
+    return rows
+
+def totals_sort_rows(player_totals):
+    """Typed sort keys matching totals_rows, column for column."""
+    return [(player, totals["kills"], totals["deaths"], totals["time_on_hill"], totals["captures"], totals["plants"],
+             kd_ratio(totals["kills"], totals["deaths"])) for player, totals in player_totals.items()]
+
+# Search
+
+def objective_matches(game_mode, stat, objective_filter):
+    if objective_filter in objective_modes:
+        return objective_modes[objective_filter] == game_mode
+    return objective_filter in (str(stat["OBJ"]), format_obj(game_mode, stat["OBJ"]))
+
+def match_passes(match, map_filter="", mode_filter="", result_filter=""):
+    return not ((map_filter and match["Map"] != map_filter) or
+                (mode_filter and match["Game Mode"] != mode_filter) or
+                (result_filter and match.get("Result") != result_filter))
+
+def stat_passes(match, stat, player_filter="", objective_filter=""):
+    return (not player_filter or stat["Player"] == player_filter) and \
+           (not objective_filter or objective_matches(match["Game Mode"], stat, objective_filter))
+
+def search_stats(match_data, player_filter="", map_filter="", mode_filter="", objective_filter="", result_filter=""):
+    """Return (match, stat) pairs for every player stat that passes the filters."""
+    results = []
+    for series in match_data:
+        for match in series["Matches"]:
+            if not match_passes(match, map_filter, mode_filter, result_filter):
+                continue
+
+            for stat in match["Player Stats"]:
+                if stat_passes(match, stat, player_filter, objective_filter):
+                    results.append((match, stat))
+    return results
+
+def search_row(match, stat):
+    return (
+        kd_indicator(stat["Kills"], stat["Deaths"]),
+        match.get("Match Number", ""),
+        stat["Player"],
+        stat["Kills"],
+        stat["Deaths"],
+        format_obj(match["Game Mode"], stat["OBJ"]),
+        match["Map"],
+        match["Game Mode"],
+        match.get("Result", "")
+    )
+
+def search_sort_row(match, stat):
+    """Typed sort keys matching search_row, column for column."""
+    match_number = match.get("Match Number", "")
+    return (
+        kd_indicator(stat["Kills"], stat["Deaths"]),
+        match_number if isinstance(match_number, int) else -1,
+        stat["Player"],
+        stat["Kills"],
+        stat["Deaths"],
+        stat["OBJ"],
+        match["Map"],
+        match["Game Mode"],
+        match.get("Result", "")
+    )
@@ -0,0 +1,270 @@
+"""
+Read-only HTTP/JSON API over the stats, for teammates without the app.
+
+Serves on localhost with asyncio; the stats file is loaded and indexed once
+and only reloaded when it (or its journal) changes on disk, which bumps a
+data version. Every response carries an ETag derived from the size and
+modification time of the stats file and journal that were loaded, so it
+stays the same across server restarts on unchanged files, and clients
+revalidating with If-None-Match get a bodyless 304 until the data changes. Encoded responses are cached per URL for the current version and
+gzipped when the client accepts it.
+
+    python main/stats_server.py cod_ireland_stats.json --port 8765
+
+Endpoints (all GET):
+    /totals                     per-player totals; ?map=Vault or ?mode=Hardpoint for a split
+    /search                     ?player=&map=&mode=&objective=&result= as in the Search tab
+    /leaderboards               top-k boards and records; ?map= and/or ?mode= to scope them
+    /leaderboards/series/<n>    top players of one series
+    /series/<series number>     one series with all its matches
+    /series/<n>/<match number>  one match
+    /version                    the current data version
+"""
+import os
+import sys
+import gzip
+import json
+import hashlib
+import asyncio
+import argparse
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+from stats_core import json_file_path, file_format_series, search_row
+from search_index import SearchIndex
+from totals_store import TotalsStore
+from match_journal import load_with_journal
+from leaderboards import LeaderboardStore, leaderboard_rows, player_boards
+from batch_report import search_columns, leaderboard_columns, spec_keys
+
+default_port = 8765
+max_header_bytes = 16384
+response_cache_size = 256
+status_text = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+class StatsService:
+    """The data behind the API: loaded once, reloaded only when the files change."""
+    def __init__(self, file_path=json_file_path):
+        self.file_path = file_path
+        self.journal_path = os.path.splitext(file_path)[0] + ".journal.jsonl"
+        self.version = 0
+        self.signature = None
+        self.tag = None
+        self.responses = OrderedDict()
+        self.reload_if_changed()
+
+    def _signature(self):
+        signature = []
+        for path in (self.file_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load_if_changed(self):
+        """Load and index the files if they changed; safe to run off the event loop."""
+        signature = self._signature()
+        if signature == self.signature:
+            return None
+        match_data = load_with_journal(self.file_path, self.journal_path) if signature[0] else []
+        return (signature, SearchIndex(match_data), TotalsStore(match_data), LeaderboardStore(match_data),
+                {series["Series Number"]: series for series in match_data})
+
+    def apply(self, state):
+        self.signature, self.search_index, self.totals_store, self.leaderboards, self.series = state
+        self.tag = hashlib.sha1(repr(self.signature).encode("utf-8")).hexdigest()[:16]
+        self.version += 1
+        self.responses.clear()
+
+    def reload_if_changed(self):
+        state = self.load_if_changed()
+        if state is None:
+            return False
+        self.apply(state)
+        return True
+
+    # Endpoints; each returns (status, JSON-serialisable body)
+
+    def totals(self, query):
+        if "map" in query:
+            return 200, {player: totals for (player, map_name), totals in self.totals_store.by_player_map.items() if map_name == query["map"]}
+        if "mode" in query:
+            return 200, {player: totals for (player, game_mode), totals in self.totals_store.by_player_mode.items() if game_mode == query["mode"]}
+        return 200, self.totals_store.by_player
+
+    def search(self, query):
+        filters = {spec_keys[key]: value for key, value in query.items() if key in spec_keys}
+        return 200, [dict(zip(search_columns, search_row(match, stat))) for match, stat in self.search_index.search(**filters)]
+
+    def leaderboard(self, query):
+        rows = leaderboard_rows(self.leaderboards, query.get("map", ""), query.get("mode", ""))
+        return 200, [dict(zip(leaderboard_columns, row)) for row in rows]
+
+    def series_leaderboard(self, series_number):
+        try:
+            series_number = int(series_number)
+        except ValueError:
+            return 400, {"error": "Series numbers must be integers."}
+        if series_number not in self.series:
+            return 404, {"error": f"No series {series_number}."}
+        return 200, {board: [{"Player": player, "Value": value} for value, player in self.leaderboards.series_board(series_number, board)]
+                     for board in player_boards}
+
+    def series_details(self, parts):
+        try:
+            numbers = [int(part) for part in parts]
+        except ValueError:
+            return 400, {"error": "Series and match numbers must be integers."}
+        series = self.series.get(numbers[0])
+        if series is None:
+            return 404, {"error": f"No series {numbers[0]}."}
+        series = file_format_series(series)
+        if len(numbers) == 1:
+            return 200, series
+        for match in series["Matches"]:
+            if match.get("Match Number") == numbers[1]:
+                return 200, match
+        return 404, {"error": f"No match {numbers[1]} in series {numbers[0]}."}
+
+    def route(self, target):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["totals"]:
+            return self.totals(query)
+        if parts == ["search"]:
+            return self.search(query)
+        if parts == ["leaderboards"]:
+            return self.leaderboard(query)
+        if len(parts) == 3 and parts[:2] == ["leaderboards", "series"]:
+            return self.series_leaderboard(parts[2])
+        if parts == ["version"]:
+            return 200, {"version": self.version}
+        if parts and parts[0] == "series" and 2 <= len(parts) <= 3:
+            return self.series_details(parts[1:])
+        return 404, {"error": f"Unknown endpoint {url.path}."}
+
+    def response(self, target):
+        """(status, body bytes, gzipped body bytes) for target, cached for the current version."""
+        cached = self.responses.get(target)
+        if cached is not None:
+            self.responses.move_to_end(target)
+            return cached
+        status, body = self.route(target)
+        data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        cached = (status, data, gzip.compress(data, compresslevel=6))
+        self.responses[target] = cached
+        if len(self.responses) > response_cache_size:
+            self.responses.popitem(last=False)
+        return cached
+
+    def etag(self):
+        return f'"{self.tag}"'
+
+async def read_request(reader):
+    """(method, target, headers) for the next request, or None at end of stream."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise ValueError("Request headers too large.")
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+def encode_response(status, headers, body=b""):
+    lines = [f"HTTP/1.1 {status} {status_text.get(status, '')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+def build_response(service, method, target, headers):
+    if method not in ("GET", "HEAD"):
+        return encode_response(405, {"Allow": "GET, HEAD", "Content-Length": "0"})
+
+    etag = service.etag()
+    common = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+        return encode_response(304, common)
+
+    status, data, gzipped = service.response(target)
+    common["Content-Type"] = "application/json"
+    if "gzip" in headers.get("accept-encoding", ""):
+        data = gzipped
+        common["Content-Encoding"] = "gzip"
+    common["Content-Length"] = str(len(data))
+    return encode_response(status, common, data if method == "GET" else b"")
+
+def make_handler(service):
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as e:
+                    message = json.dumps({"error": str(e)}).encode("utf-8")
+                    writer.write(encode_response(400, {"Content-Type": "application/json", "Content-Length": str(len(message)), "Connection": "close"}, message))
+                    break
+                if request is None:
+                    break
+                method, target, headers = request
+                writer.write(build_response(service, method, target, headers))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+async def watch_for_changes(service, interval):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Parse and index in a thread so readers keep being served, then swap on the loop
+            state = await asyncio.to_thread(service.load_if_changed)
+            if state is not None:
+                service.apply(state)
+                print(f"Reloaded {service.file_path} (data version {service.version})")
+        except (OSError, ValueError) as e:
+            print(f"Keeping data version {service.version}; reload failed: {e}")
+
+async def serve(service, host="127.0.0.1", port=default_port, poll_interval=2.0):
+    server = await asyncio.start_server(make_handler(service), host, port, limit=max_header_bytes, backlog=512)
+    watcher = asyncio.create_task(watch_for_changes(service, poll_interval))
+    print(f"Serving {service.file_path} on http://{host}:{port}/ (data version {service.version})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("stats_file", nargs="?", default=json_file_path, help="stats JSON file (its journal is replayed too)")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=default_port, help="port to listen on")
+    parser.add_argument("--poll", type=float, default=2.0, help="seconds between checks for a changed stats file")
+    args = parser.parse_args(argv)
+
+    try:
+        service = StatsService(args.stats_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.poll))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
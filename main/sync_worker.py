@@ -0,0 +1,135 @@
+"""
+Background sync worker for moving stats files to and from remote storage.
+
+Jobs run one at a time on a worker thread with retries and exponential
+backoff. Progress and completion callbacks are queued back and run on the Tk
+thread by attach(), which polls the queue with root.after(). The remote side
+is a pluggable transport with upload(local_path, remote_name) and
+download(remote_name, local_path); delta_sync.DeltaTransport over either
+drive_sync.DriveStore or the on-disk LocalFolderStore is what the app uses.
+A transport raises SyncConflict when the remote file changed since it was
+last synced; like a missing file, that is not retried.
+"""
+import os
+import queue
+import threading
+
+class SyncCancelled(Exception):
+    pass
+
+class SyncConflict(Exception):
+    def __init__(self, message, remote_name):
+        super().__init__(message)
+        self.remote_name = remote_name
+
+class SyncJob:
+    def __init__(self, action, local_path, remote_name, on_done=None):
+        self.action = action
+        self.local_path = local_path
+        self.remote_name = remote_name
+        self.on_done = on_done
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def describe(self):
+        return f"{'Uploading' if self.action == 'upload' else 'Downloading'} {self.remote_name}"
+
+class SyncWorker:
+    def __init__(self, transport, max_attempts=4, base_delay=1.0, on_progress=None):
+        self.transport = transport
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.on_progress = on_progress
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.current_job = None
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sync-worker", daemon=True)
+        self.thread.start()
+
+    # Called from the Tk thread
+
+    def upload(self, local_path, remote_name=None, on_done=None):
+        return self._submit(SyncJob("upload", local_path, remote_name or os.path.basename(local_path), on_done))
+
+    def download(self, remote_name, local_path, on_done=None):
+        return self._submit(SyncJob("download", local_path, remote_name, on_done))
+
+    def _submit(self, job):
+        self.jobs.put(job)
+        return job
+
+    def cancel_all(self):
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            job.cancel()
+            self._emit(job.on_done, False, SyncCancelled(f"{job.describe()} cancelled."))
+        if self.current_job is not None:
+            self.current_job.cancel()
+
+    def stop(self):
+        self.stopping.set()
+        self.cancel_all()
+        self.jobs.put(None)
+
+    def attach(self, root, interval=100):
+        """Run queued progress/completion callbacks on the Tk thread."""
+        self.process_events()
+        root.after(interval, self.attach, root, interval)
+
+    def process_events(self):
+        while True:
+            try:
+                callback, args = self.events.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    # Worker thread
+
+    def _emit(self, callback, *args):
+        if callback is not None:
+            self.events.put((callback, args))
+
+    def _progress(self, message):
+        self._emit(self.on_progress, message)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.current_job = job
+            try:
+                result = self._run_job(job)
+                self._progress(f"{job.describe()} {result or 'done'}.")
+                self._emit(job.on_done, True, None)
+            except Exception as e:
+                self._progress(f"{job.describe()} failed: {e}")
+                self._emit(job.on_done, False, e)
+            finally:
+                self.current_job = None
+
+    def _run_job(self, job):
+        for attempt in range(1, self.max_attempts + 1):
+            if job.cancelled.is_set():
+                raise SyncCancelled(f"{job.describe()} cancelled.")
+            self._progress(f"{job.describe()} (attempt {attempt}/{self.max_attempts})...")
+            try:
+                if job.action == "upload":
+                    return self.transport.upload(job.local_path, job.remote_name)
+                return self.transport.download(job.remote_name, job.local_path)
+            except (FileNotFoundError, SyncConflict):
+                raise
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                delay = self.base_delay * 2 ** (attempt - 1)
+                self._progress(f"{job.describe()} failed ({e}), retrying in {delay:g}s...")
+                if job.cancelled.wait(delay):
+                    raise SyncCancelled(f"{job.describe()} cancelled.")
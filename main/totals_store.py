@@ -0,0 +1,91 @@
+"""
+Running per-player totals for the Totals tab.
+
+Totals are kept per player, per player x map and per player x game mode, and
+updated one match at a time so reading them never walks match_data. With
+verify turned on every read is checked against a full recompute.
+"""
+from stats_core import new_player_totals, add_stat_to_totals, compute_player_totals, iter_stats
+
+class TotalsStore:
+    def __init__(self, match_data=None, verify=False):
+        self.verify = verify
+        self.match_data = []
+        self.clear()
+        if match_data:
+            self.build(match_data)
+
+    def clear(self):
+        self.by_player = {}
+        self.by_player_map = {}
+        self.by_player_mode = {}
+
+    def build(self, match_data):
+        self.clear()
+        self.match_data = match_data
+        for series in match_data:
+            for match in series["Matches"]:
+                self.add_match(match)
+
+    def add_match(self, match):
+        game_mode = match["Game Mode"]
+        for stat in match["Player Stats"]:
+            player = stat["Player"]
+            for store, key in ((self.by_player, player),
+                               (self.by_player_map, (player, match["Map"])),
+                               (self.by_player_mode, (player, game_mode))):
+                if key not in store:
+                    store[key] = new_player_totals()
+                add_stat_to_totals(store[key], game_mode, stat)
+
+    def add_series(self, series):
+        for match in series["Matches"]:
+            self.add_match(match)
+
+    def to_state(self):
+        return {
+            "player": [[player, totals] for player, totals in self.by_player.items()],
+            "player_map": [[player, map_name, totals] for (player, map_name), totals in self.by_player_map.items()],
+            "player_mode": [[player, game_mode, totals] for (player, game_mode), totals in self.by_player_mode.items()]
+        }
+
+    def load_state(self, state, match_data=None):
+        self.match_data = match_data if match_data is not None else []
+        self.by_player = {player: totals for player, totals in state["player"]}
+        self.by_player_map = {(player, map_name): totals for player, map_name, totals in state["player_map"]}
+        self.by_player_mode = {(player, game_mode): totals for player, game_mode, totals in state["player_mode"]}
+
+    def player_totals(self):
+        if self.verify:
+            self.check(self.match_data)
+        return self.by_player
+
+    def map_totals(self, player, map_name):
+        return self.by_player_map.get((player, map_name), new_player_totals())
+
+    def mode_totals(self, player, game_mode):
+        return self.by_player_mode.get((player, game_mode), new_player_totals())
+
+    def recompute(self, match_data):
+        by_player_map = {}
+        by_player_mode = {}
+        for _, match, stat in iter_stats(match_data):
+            for store, key in ((by_player_map, (stat["Player"], match["Map"])),
+                               (by_player_mode, (stat["Player"], match["Game Mode"]))):
+                if key not in store:
+                    store[key] = new_player_totals()
+                add_stat_to_totals(store[key], match["Game Mode"], stat)
+        return compute_player_totals(match_data), by_player_map, by_player_mode
+
+    def check(self, match_data):
+        """Compare the running totals with a full recompute and return the mismatches."""
+        expected = self.recompute(match_data)
+        actual = (self.by_player, self.by_player_map, self.by_player_mode)
+        mismatches = []
+        for name, want, have in zip(("player", "player x map", "player x mode"), expected, actual):
+            for key in want.keys() | have.keys():
+                if want.get(key) != have.get(key):
+                    mismatches.append((name, key, want.get(key), have.get(key)))
+        for mismatch in mismatches:
+            print(f"Totals mismatch ({mismatch[0]}) for {mismatch[1]}: expected {mismatch[2]}, got {mismatch[3]}")
+        return mismatches
@@ -0,0 +1,127 @@
+"""
+Rolling-window trends: recent form over the last N matches or series.
+
+Every player, player x map, player x game mode and player x map x game mode
+has a window over its last N matches and another over its last N series. A
+window keeps its entries in a bounded deque and running sums of them, so
+adding an entry (and dropping the oldest once full) is O(1) and reading K/D,
+win rate or objective rates never walks the history.
+"""
+from collections import deque
+
+from stats_core import kd_ratio
+
+default_window = 20
+
+# kills, deaths, wins, games, then per objective mode: value and games played
+entry_fields = ("kills", "deaths", "wins", "games",
+                "time_on_hill", "hardpoint_games", "captures", "control_games", "plants", "snd_games")
+mode_fields = {
+    "Hardpoint": ("time_on_hill", "hardpoint_games"),
+    "Control": ("captures", "control_games"),
+    "Search and Destroy": ("plants", "snd_games")
+}
+
+def new_entry():
+    return dict.fromkeys(entry_fields, 0)
+
+def add_stat_to_entry(entry, match, stat):
+    entry["kills"] += stat["Kills"]
+    entry["deaths"] += stat["Deaths"]
+    entry["wins"] += match.get("Result") == "Win"
+    entry["games"] += 1
+    fields = mode_fields.get(match["Game Mode"])
+    if fields:
+        entry[fields[0]] += stat["OBJ"]
+        entry[fields[1]] += 1
+
+def _rate(total, games):
+    return total / games if games else 0.0
+
+class RollingWindow:
+    def __init__(self, size):
+        self.entries = deque()
+        self.size = size
+        self.sums = new_entry()
+
+    def push(self, entry):
+        self.entries.append(entry)
+        for field in entry_fields:
+            self.sums[field] += entry[field]
+        if len(self.entries) > self.size:
+            oldest = self.entries.popleft()
+            for field in entry_fields:
+                self.sums[field] -= oldest[field]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self):
+        sums = self.sums
+        return {
+            "entries": len(self.entries),
+            "games": sums["games"],
+            "kd": kd_ratio(sums["kills"], sums["deaths"]),
+            "win_rate": _rate(sums["wins"], sums["games"]),
+            "time_on_hill": _rate(sums["time_on_hill"], sums["hardpoint_games"]),
+            "captures": _rate(sums["captures"], sums["control_games"]),
+            "plants": _rate(sums["plants"], sums["snd_games"])
+        }
+
+class TrendStore:
+    def __init__(self, match_data=None, window=default_window):
+        self.window = window
+        self.clear()
+        if match_data:
+            self.build(match_data)
+
+    def clear(self):
+        self.matches = {}
+        self.series = {}
+
+    def build(self, match_data):
+        self.clear()
+        for series in match_data:
+            self.add_series(series)
+
+    def _push(self, windows, key, entry):
+        window = windows.get(key)
+        if window is None:
+            window = windows[key] = RollingWindow(self.window)
+        window.push(entry)
+
+    def add_series(self, series):
+        series_entries = {}
+        for match in series["Matches"]:
+            for stat in match["Player Stats"]:
+                player = stat["Player"]
+                map_name, game_mode = match["Map"], match["Game Mode"]
+                for key in ((player, "", ""), (player, map_name, ""), (player, "", game_mode), (player, map_name, game_mode)):
+                    entry = new_entry()
+                    add_stat_to_entry(entry, match, stat)
+                    self._push(self.matches, key, entry)
+                    if key not in series_entries:
+                        series_entries[key] = new_entry()
+                    add_stat_to_entry(series_entries[key], match, stat)
+        for key, entry in series_entries.items():
+            self._push(self.series, key, entry)
+
+    def trend(self, player, map_name="", game_mode="", per_series=False):
+        """Summary of one window; map_name and/or game_mode narrow it."""
+        windows = self.series if per_series else self.matches
+        window = windows.get((player, map_name, game_mode))
+        return window.summary() if window is not None else RollingWindow(0).summary()
+
+    def player_trends(self, map_name="", game_mode="", per_series=False):
+        windows = self.series if per_series else self.matches
+        return {player: window.summary() for (player, window_map, window_mode), window in windows.items()
+                if window_map == map_name and window_mode == game_mode}
+
+def trend_rows(player_trends):
+    return [(player, trend["games"], f"{trend['kd']:.2f}", f"{trend['win_rate']:.0%}", f"{trend['time_on_hill']:.0f}s",
+             f"{trend['captures']:.2f}", f"{trend['plants']:.2f}") for player, trend in player_trends.items()]
+
+def trend_sort_rows(player_trends):
+    """Typed sort keys matching trend_rows, column for column."""
+    return [(player, trend["games"], trend["kd"], trend["win_rate"], trend["time_on_hill"], trend["captures"], trend["plants"])
+            for player, trend in player_trends.items()]
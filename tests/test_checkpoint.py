@@ -0,0 +1,149 @@
+"""
+Tests for the match journal and the background Checkpointer.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from stats_core import write_stats_file
+from match_journal import append_series_batch, load_with_journal, read_journal, journal_length
+from bulk_import import merge_stats, parse_file
+from checkpoint import Checkpointer
+
+def make_series(series_number, kills):
+    """A one-match series whose content (and so match_hash) is set by kills."""
+    return {"Series Number": series_number, "Matches": [{
+        "Game Mode": "Control", "Map": "Vault", "Match Number": 1, "Result": "Win",
+        "Player Stats": [{"Player": "Bapper", "Kills": kills, "Deaths": 10, "OBJ": 2}]
+    }]}
+
+def kills_in(match_data):
+    return [series["Matches"][0]["Player Stats"][0]["Kills"] for series in match_data]
+
+def series_numbers(match_data):
+    return [series["Series Number"] for series in match_data]
+
+class CheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.file_path = self.path("stats.json")
+        self.journal_path = self.path("stats.journal.jsonl")
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def load(self):
+        return load_with_journal(self.file_path, self.journal_path)
+
+    def checkpointer(self, interval=0.01, **options):
+        checkpointer = Checkpointer(self.file_path, self.journal_path, interval=interval, **options)
+        self.addCleanup(checkpointer.stop, 5.0)
+        return checkpointer
+
+class JournalReplayTests(CheckpointTestCase):
+    def test_torn_last_line_is_ignored_and_the_next_append_starts_fresh(self):
+        write_stats_file([make_series(1, 11)], self.file_path)
+        append_series_batch([make_series(2, 12)], self.journal_path)
+        with open(self.journal_path, "a") as file:
+            file.write('{"Series Number": 3, "Matc')  # crash mid-write
+        self.assertEqual(kills_in(self.load()), [11, 12])
+
+        append_series_batch([make_series(3, 13)], self.journal_path)
+        self.assertEqual(kills_in(read_journal(self.journal_path)), [12, 13])
+        self.assertEqual(kills_in(self.load()), [11, 12, 13])
+
+    def test_records_already_in_the_snapshot_are_skipped(self):
+        # A crash between the rewrite and the journal delete leaves both
+        history = [make_series(1, 11), make_series(2, 12)]
+        append_series_batch(history[1:], self.journal_path)
+        write_stats_file(history, self.file_path)
+        self.assertEqual(kills_in(self.load()), [11, 12])
+
+    def test_new_record_with_a_used_number_is_renumbered(self):
+        write_stats_file([make_series(1, 11), make_series(2, 12)], self.file_path)
+        append_series_batch([make_series(2, 20), make_series(3, 30)], self.journal_path)
+        match_data = self.load()
+        self.assertEqual(kills_in(match_data), [11, 12, 20, 30])
+        self.assertEqual(series_numbers(match_data), [1, 2, 3, 4])
+
+class CheckpointerTests(CheckpointTestCase):
+    def test_round_saved_during_a_merge_survives(self):
+        write_stats_file([make_series(1, 11), make_series(2, 12), make_series(3, 13)], self.file_path)
+        import_path = self.path("import.json")
+        write_stats_file([make_series(1, 41), make_series(2, 42)], import_path)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def merge(history):
+            started.set()
+            release.wait(5.0)
+            return merge_stats(history, [parse_file(import_path)])["matches"] > 0
+
+        checkpointer = self.checkpointer()
+        checkpointer.compact(self.load(), update=merge)
+        self.assertTrue(started.wait(5.0))
+        # The app numbered this round before the merge took 4 and 5
+        checkpointer.save(make_series(4, 50))
+        release.set()
+        self.assertTrue(checkpointer.flush(5.0))
+
+        match_data = self.load()
+        self.assertEqual(kills_in(match_data), [11, 12, 13, 41, 42, 50])
+        self.assertEqual(series_numbers(match_data), [1, 2, 3, 4, 5, 6])
+
+        # The next rewrite drops the journal; the round must be in the file by then
+        checkpointer.compact()
+        self.assertTrue(checkpointer.flush(5.0))
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(kills_in(self.load()), [11, 12, 13, 41, 42, 50])
+
+    def test_saves_are_journaled_in_one_group_commit(self):
+        write_stats_file([], self.file_path)
+        checkpointer = self.checkpointer(interval=60.0)
+        for number in range(1, 4):
+            checkpointer.save(make_series(number, 10 + number))
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertTrue(checkpointer.flush(5.0))
+        self.assertEqual(journal_length(self.journal_path), 3)
+        self.assertEqual(kills_in(self.load()), [11, 12, 13])
+
+    def test_save_queued_behind_a_compaction_survives_it(self):
+        write_stats_file([], self.file_path)
+        history = [make_series(1, 11), make_series(2, 12)]
+        checkpointer = self.checkpointer(interval=60.0)
+        with checkpointer.condition:
+            # The worker takes both at once: the rewrite of the older history must keep the later save
+            checkpointer.compact(history)
+            checkpointer.save(make_series(3, 13))
+        self.assertTrue(checkpointer.flush(5.0))
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(kills_in(self.load()), [11, 12, 13])
+
+    def test_compaction_reports_the_saves_it_covers(self):
+        write_stats_file([], self.file_path)
+        compacted = []
+        checkpointer = self.checkpointer(on_compacted=compacted.append)
+        checkpointer.save(make_series(1, 11))
+        checkpointer.compact([make_series(1, 11)])
+        self.assertTrue(checkpointer.flush(5.0))
+        checkpointer.process_events()
+        self.assertEqual([(saves, kills_in(history), indexes) for saves, history, indexes in compacted],
+                         [(1, [11], None)])
+
+    def test_rewrite_renumbers_colliding_series(self):
+        checkpointer = self.checkpointer()
+        checkpointer.compact([make_series(1, 11), make_series(1, 12), make_series(3, 13)])
+        self.assertTrue(checkpointer.flush(5.0))
+        self.assertEqual(series_numbers(self.load()), [1, 2, 3])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Offline tests for DeltaTransport over LocalFolderStore.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from delta_sync import DeltaTransport, LocalFolderStore
+from sync_worker import SyncWorker, SyncConflict
+
+class CountingStore(LocalFolderStore):
+    """LocalFolderStore that records calls and can fail the next few updates."""
+    def __init__(self, folder, failures=0):
+        super().__init__(folder)
+        self.calls = []
+        self.failures = failures
+
+    def create(self, local_path, name):
+        self.calls.append(("create", name))
+        # LocalFolderStore.create writes through update(); bypass the counting override
+        return LocalFolderStore.update(self, name, local_path)
+
+    def update(self, file_id, local_path):
+        self.calls.append(("update", file_id))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("network down")
+        return super().update(file_id, local_path)
+
+class DeltaTransportTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.local_path = self.path("cod_ireland_stats.json")
+        self.write(self.local_path, "[1]")
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def wait_for(self, worker, results, timeout=5.0):
+        """Run the worker's queued callbacks (the Tk thread's job) until a job has finished."""
+        deadline = time.monotonic() + timeout
+        while not results and time.monotonic() < deadline:
+            worker.process_events()
+            time.sleep(0.001)
+
+    def transport(self, store, state_name="state.json"):
+        return DeltaTransport(store, self.path(state_name))
+
+    def test_unchanged_upload_is_skipped(self):
+        store = CountingStore(self.path("remote"))
+        transport = self.transport(store)
+        self.assertEqual(transport.upload(self.local_path, "stats.json"), "uploaded")
+        self.assertEqual(transport.upload(self.local_path, "stats.json"), "unchanged")
+        self.assertEqual(store.calls, [("create", "stats.json")])
+
+    def test_unchanged_upload_is_skipped_after_restart(self):
+        store = CountingStore(self.path("remote"))
+        self.transport(store).upload(self.local_path, "stats.json")
+        self.assertEqual(self.transport(store).upload(self.local_path, "stats.json"), "unchanged")
+        self.assertEqual(len(store.calls), 1)
+
+    def test_changed_upload_updates_by_id(self):
+        store = CountingStore(self.path("remote"))
+        transport = self.transport(store)
+        transport.upload(self.local_path, "stats.json")
+        self.write(self.local_path, "[1, 2]")
+        self.assertEqual(transport.upload(self.local_path, "stats.json"), "uploaded")
+        self.assertEqual(store.calls, [("create", "stats.json"), ("update", "stats.json")])
+        self.assertEqual(self.read(self.path("remote/stats.json")), "[1, 2]")
+        self.assertEqual(sorted(os.listdir(self.path("remote"))), ["stats.json"])
+
+    def test_upload_refused_when_remote_changed(self):
+        store = CountingStore(self.path("remote"))
+        transport = self.transport(store)
+        transport.upload(self.local_path, "stats.json")
+
+        # Another machine syncs and uploads its own copy
+        other_path = self.path("other.json")
+        other = self.transport(store, "other-state.json")
+        other.download("stats.json", other_path)
+        self.write(other_path, "[1, 3]")
+        other.upload(other_path, "stats.json")
+
+        self.write(self.local_path, "[1, 2]")
+        with self.assertRaises(SyncConflict) as raised:
+            transport.upload(self.local_path, "stats.json")
+        self.assertEqual(raised.exception.remote_name, "stats.json")
+        self.assertEqual(self.read(self.path("remote/stats.json")), "[1, 3]")
+
+        # Once the remote copy has been downloaded the next upload goes through
+        self.assertEqual(transport.download("stats.json", self.path("merged.json")), "downloaded")
+        self.assertEqual(transport.upload(self.local_path, "stats.json"), "uploaded")
+        self.assertEqual(self.read(self.path("remote/stats.json")), "[1, 2]")
+
+    def test_upload_without_sync_state_refused_over_a_different_remote(self):
+        store = CountingStore(self.path("remote"))
+        other_path = self.path("other.json")
+        self.write(other_path, "[1, 3]")
+        self.transport(store, "other-state.json").upload(other_path, "stats.json")
+
+        # First export from a machine with no state file yet
+        transport = self.transport(store)
+        with self.assertRaises(SyncConflict):
+            transport.upload(self.local_path, "stats.json")
+        self.assertEqual(self.read(self.path("remote/stats.json")), "[1, 3]")
+        self.assertEqual(store.calls, [("create", "stats.json")])
+
+        # Identical content is just recorded as synced
+        self.write(self.local_path, "[1, 3]")
+        self.assertEqual(self.transport(store, "fresh-state.json").upload(self.local_path, "stats.json"), "unchanged")
+
+    def test_download_skipped_when_revision_matches(self):
+        store = CountingStore(self.path("remote"))
+        transport = self.transport(store)
+        transport.upload(self.local_path, "stats.json")
+        download_path = self.path("download.json")
+        self.assertEqual(transport.download("stats.json", download_path), "downloaded")
+        self.assertEqual(transport.download("stats.json", download_path), "unchanged")
+
+    def test_download_of_missing_file_raises(self):
+        transport = self.transport(CountingStore(self.path("remote")))
+        with self.assertRaises(FileNotFoundError):
+            transport.download("stats.json", self.path("download.json"))
+
+    def test_failed_update_is_retried_by_worker(self):
+        store = CountingStore(self.path("remote"))
+        transport = self.transport(store)
+        transport.upload(self.local_path, "stats.json")
+        self.write(self.local_path, "[1, 2]")
+        store.failures = 2
+
+        results = []
+        worker = SyncWorker(transport, max_attempts=3, base_delay=0.001)
+        self.addCleanup(worker.stop)
+        worker.upload(self.local_path, "stats.json", on_done=lambda *result: results.append(result))
+        self.wait_for(worker, results)
+
+        self.assertEqual(results, [(True, None)])
+        self.assertEqual(store.calls.count(("update", "stats.json")), 3)
+        self.assertEqual(self.read(self.path("remote/stats.json")), "[1, 2]")
+        self.assertEqual(self.transport(store).upload(self.local_path, "stats.json"), "unchanged")
+
+if __name__ == "__main__":
+    unittest.main()
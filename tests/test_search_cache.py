@@ -0,0 +1,57 @@
+"""
+Tests for SearchCache over a SearchIndex.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from stats_core import search_stats, search_row
+from search_index import SearchIndex
+from search_cache import SearchCache
+
+def make_history():
+    history = []
+    for number, (map_name, game_mode, result) in enumerate([("Vault", "Hardpoint", "Win"), ("Skyline", "Control", "Loss"),
+                                                            ("Vault", "Control", "Win"), ("Rewind", "Hardpoint", "Loss")], start=1):
+        history.append({"Series Number": number, "Matches": [{
+            "Game Mode": game_mode, "Map": map_name, "Match Number": 1, "Result": result,
+            "Player Stats": [{"Player": player, "Kills": number + offset, "Deaths": 10, "OBJ": 60 + offset}
+                             for offset, player in enumerate(("Bapper", "Jordy", "Stevo"))]
+        }]})
+    return history
+
+class SearchCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.history = make_history()
+        self.cache = SearchCache(SearchIndex(self.history), max_rows=8)  # each player has 4 rows
+
+    def assertSameRows(self, filters):
+        expected = [search_row(match, stat) for match, stat in search_stats(self.history, *filters)]
+        self.assertEqual([search_row(match, stat) for match, stat in self.cache.search(*filters)], expected)
+
+    def test_refined_results_match_a_full_search(self):
+        self.cache = SearchCache(SearchIndex(self.history))
+        for filters in [("Bapper",), ("Bapper", "Vault"), ("Bapper", "Vault", "Control"),
+                        ("Bapper", "", "", "01:00"), ("", "Vault", "", "", "Win"), ("Bapper",)]:
+            self.assertSameRows(filters)
+        self.assertEqual((self.cache.misses, self.cache.refinements, self.cache.hits), (2, 3, 1))
+
+    def test_cache_is_bounded_by_rows_held(self):
+        self.cache.search("Bapper")
+        self.cache.search("Jordy")
+        self.cache.search("Stevo")
+        self.assertEqual(list(self.cache.results), [("Jordy", "", "", "", ""), ("Stevo", "", "", "", "")])
+        self.assertEqual(self.cache.rows_held, 8)
+
+    def test_result_larger_than_the_bound_is_still_kept_alone(self):
+        self.cache.search("Bapper")
+        self.assertSameRows(())
+        self.assertEqual(list(self.cache.results), [("", "", "", "", "")])
+        self.assertEqual(self.cache.rows_held, 12)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests for the memory-mapped index snapshot.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from stats_core import write_stats_file, search_stats, search_row
+from search_index import SearchIndex
+from totals_store import TotalsStore
+from snapshot import write_snapshot, read_snapshot, release_snapshot, snapshot_path_for
+
+def make_history(kills=11):
+    return [{"Series Number": number, "Matches": [{
+        "Game Mode": game_mode, "Map": "Vault", "Match Number": 1, "Result": "Win",
+        "Player Stats": [{"Player": "Bapper", "Kills": kills, "Deaths": 10, "OBJ": 75},
+                         {"Player": "Jordy", "Kills": 20, "Deaths": 15, "OBJ": 3}]
+    }]} for number, game_mode in enumerate(("Hardpoint", "Control", "Hardpoint"), start=1)]
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.file_path = os.path.join(self.folder, "stats.json")
+        self.history = make_history()
+        write_stats_file(self.history, self.file_path)
+
+    def write(self, history=None):
+        history = history or self.history
+        return write_snapshot(SearchIndex(history), TotalsStore(history), self.file_path)
+
+    def read(self):
+        snapshot = read_snapshot(self.file_path)
+        if snapshot is not None:
+            self.addCleanup(release_snapshot, snapshot[0])
+        return snapshot
+
+    def test_current_snapshot_answers_like_the_history(self):
+        self.write()
+        search_index, totals_store = self.read()
+        for filters in [(), ("Bapper",), ("", "", "Hardpoint"), ("", "", "", "01:15"), ("Jordy", "", "", "3")]:
+            self.assertEqual([search_row(*row) for row in search_index.search(*filters)],
+                             [search_row(*row) for row in search_stats(self.history, *filters)])
+        self.assertEqual(totals_store.player_totals(), TotalsStore(self.history).player_totals())
+
+    def test_snapshot_of_changed_file_is_rejected(self):
+        self.write()
+        write_stats_file(self.history + make_history(), self.file_path)
+        self.assertIsNone(self.read())
+
+    def test_same_size_different_content_is_rejected(self):
+        self.write()
+        size = os.path.getsize(self.file_path)
+        write_stats_file(make_history(kills=12), self.file_path)
+        self.assertEqual(os.path.getsize(self.file_path), size)
+        os.utime(self.file_path, ns=(0, 1))
+        self.assertIsNone(self.read())
+
+    def test_touched_but_unchanged_file_is_accepted(self):
+        self.write()
+        os.utime(self.file_path, ns=(0, 1))
+        self.assertIsNotNone(self.read())
+
+    def test_corrupt_or_foreign_snapshots_are_rejected(self):
+        snapshot_path = snapshot_path_for(self.file_path)
+        for content in (b"", b"CODSNAP", b"NOTASNAP" + b"\0" * 64):
+            with open(snapshot_path, "wb") as file:
+                file.write(content)
+            self.assertIsNone(self.read())
+
+        self.write()
+        with open(snapshot_path, "r+b") as file:
+            file.seek(8)
+            file.write(b"\xff\xff\xff\xff")  # version
+        self.assertIsNone(self.read())
+
+    def test_snapshot_without_postings_is_rejected_where_they_are_needed(self):
+        uses_postings = SearchIndex.use_postings
+        self.addCleanup(setattr, SearchIndex, "use_postings", uses_postings)
+        SearchIndex.use_postings = False
+        self.write()
+        SearchIndex.use_postings = True
+        self.assertIsNone(self.read())
+
+        self.write()
+        search_index, _ = self.read()
+        self.assertEqual(len(search_index.search("Bapper")), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for stats file reading and writing in stats_core.
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from stats_core import (write_stats_file, load_stats_file, detect_compression, iter_json_array,
+                        StatsValidationError)
+
+def make_history(count):
+    return [{"Series Number": number, "Matches": [{
+        "Game Mode": "Hardpoint", "Map": "Vault", "Match Number": 1, "Result": "Win",
+        "Player Stats": [{"Player": "Bapper", "Kills": number, "Deaths": 10, "OBJ": 75}]
+    }]} for number in range(1, count + 1)]
+
+class StatsFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def read_bytes(self, path):
+        with open(path, "rb") as file:
+            return file.read()
+
+chunk_sizes = (1, 2, 3, 7, 65536)
+
+def parse(text, chunk_size):
+    return list(iter_json_array(io.StringIO(text), chunk_size))
+
+class JsonArrayTests(unittest.TestCase):
+    def test_elements_match_json_loads_across_chunk_boundaries(self):
+        for text in ('[]', ' [ ] ', '[1]', '[ 12345 , -2.5e3,true ,null, "a,]b\\"" ]',
+                     '[{"a": [1, {"b": "]"}]}, [], {}]', '\n[\n  {"x": 1},\n  {"y": [2, 3]}\n]\n'):
+            for chunk_size in chunk_sizes:
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual([element for _, element in parse(text, chunk_size)], json.loads(text))
+
+    def test_line_numbers_point_at_each_element(self):
+        text = '[\n{"a": 1},\n\n{"b":\n 2},\n{"c": 3}]'
+        for chunk_size in chunk_sizes:
+            self.assertEqual([line for line, _ in parse(text, chunk_size)], [2, 4, 6])
+
+    def test_malformed_arrays_are_rejected(self):
+        for text in ('', '   ', '{}', '1', '[', '[1', '[1,', '[1,]', '[,1]', '[1,,2]', '[1 2]',
+                     '[{"a": 1} {"b": 2}]', '[1]]', '[1] x', '[1][2]', '[tru]', '["unterminated]'):
+            for chunk_size in chunk_sizes:
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    with self.assertRaises(ValueError):
+                        parse(text, chunk_size)
+
+class ValidationTests(StatsFileTestCase):
+    def write_json(self, data):
+        path = self.path("stats.json")
+        with open(path, "w") as file:
+            json.dump(data, file, indent=4)
+        return path
+
+    def test_every_bad_stat_is_reported(self):
+        history = make_history(4)
+        history[1]["Matches"][0]["Player Stats"][0]["Kills"] = True
+        history[2]["Matches"][0]["Player Stats"][0]["Deaths"] = 10.0
+        history[3]["Matches"][0]["Player Stats"][0]["OBJ"] = "1:15:00"
+        with self.assertRaises(StatsValidationError) as raised:
+            load_stats_file(self.write_json(history))
+        self.assertEqual(len(raised.exception.errors), 3)
+        self.assertTrue(raised.exception.errors[0].startswith("series 2 (line "))
+
+    def test_obj_text_is_normalised(self):
+        history = make_history(1)
+        history[0]["Matches"][0]["Player Stats"][0]["OBJ"] = "01:15"
+        self.assertEqual(load_stats_file(self.write_json(history)), make_history(1))
+
+class CompressedFileTests(StatsFileTestCase):
+    def test_gzip_round_trip(self):
+        history = make_history(3)
+        write_stats_file(history, self.path("stats.json"), "gzip")
+        self.assertEqual(detect_compression(self.path("stats.json")), "gzip")
+        self.assertEqual(load_stats_file(self.path("stats.json")), history)
+
+    def test_gzip_output_is_deterministic(self):
+        # Identical exports must hash the same or the unchanged-upload skip never fires
+        write_stats_file(make_history(3), self.path("stats.json"), "gzip")
+        first = self.read_bytes(self.path("stats.json"))
+        time.sleep(1.1)  # the gzip header's mtime has one-second resolution
+        write_stats_file(make_history(3), self.path("stats.json"), "gzip")
+        self.assertEqual(self.read_bytes(self.path("stats.json")), first)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Tests for SyncWorker queueing, retries and backoff, against a fake transport.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from sync_worker import SyncWorker, SyncCancelled, SyncConflict
+
+class FakeTransport:
+    """Records calls; fail_with[name] lists exceptions raised by successive calls for that file."""
+    def __init__(self, fail_with=None, gate=None):
+        self.calls = []
+        self.fail_with = fail_with or {}
+        self.gate = gate
+
+    def _call(self, action, name):
+        self.calls.append((action, name, time.monotonic()))
+        if self.gate is not None:
+            self.gate.wait(5.0)
+        failures = self.fail_with.get(name)
+        if failures:
+            raise failures.pop(0)
+        return "done"
+
+    def upload(self, local_path, remote_name):
+        return self._call("upload", remote_name)
+
+    def download(self, remote_name, local_path):
+        return self._call("download", remote_name)
+
+class SyncWorkerTests(unittest.TestCase):
+    def make_worker(self, transport, **options):
+        self.progress = []
+        worker = SyncWorker(transport, on_progress=self.progress.append, **options)
+        self.addCleanup(worker.stop)
+        return worker
+
+    def wait_for(self, worker, results, count, timeout=5.0):
+        """Run the worker's queued callbacks (the Tk thread's job) until count jobs have finished."""
+        deadline = time.monotonic() + timeout
+        while len(results) < count and time.monotonic() < deadline:
+            worker.process_events()
+            time.sleep(0.001)
+        self.assertEqual(len(results), count)
+
+    def done(self, results, name):
+        return lambda success, error: results.append((name, success, error))
+
+    def test_jobs_run_in_submission_order(self):
+        transport = FakeTransport()
+        worker = self.make_worker(transport)
+        results = []
+        worker.upload("a.json", on_done=self.done(results, "a"))
+        worker.download("b.json", "b.local", on_done=self.done(results, "b"))
+        worker.upload("/tmp/c.json", on_done=self.done(results, "c"))
+        self.wait_for(worker, results, 3)
+
+        self.assertEqual([call[:2] for call in transport.calls],
+                         [("upload", "a.json"), ("download", "b.json"), ("upload", "c.json")])
+        self.assertEqual(results, [("a", True, None), ("b", True, None), ("c", True, None)])
+
+    def test_callbacks_wait_for_process_events(self):
+        worker = self.make_worker(FakeTransport())
+        results = []
+        worker.upload("a.json", on_done=self.done(results, "a"))
+        time.sleep(0.05)
+        self.assertEqual(results, [])
+        self.wait_for(worker, results, 1)
+
+    def test_transient_errors_are_retried_with_exponential_backoff(self):
+        transport = FakeTransport({"a.json": [ConnectionError("down"), ConnectionError("down")]})
+        worker = self.make_worker(transport, max_attempts=4, base_delay=0.02)
+        results = []
+        worker.upload("a.json", on_done=self.done(results, "a"))
+        self.wait_for(worker, results, 1)
+
+        self.assertEqual(results, [("a", True, None)])
+        times = [call[2] for call in transport.calls]
+        self.assertEqual(len(times), 3)
+        self.assertGreaterEqual(times[1] - times[0], 0.02)
+        self.assertGreaterEqual(times[2] - times[1], 0.04)
+        self.assertIn("Uploading a.json failed (down), retrying in 0.04s...", self.progress)
+
+    def test_gives_up_after_max_attempts(self):
+        error = ConnectionError("down")
+        transport = FakeTransport({"a.json": [error] * 5})
+        worker = self.make_worker(transport, max_attempts=3, base_delay=0.001)
+        results = []
+        worker.upload("a.json", on_done=self.done(results, "a"))
+        self.wait_for(worker, results, 1)
+
+        self.assertEqual(results, [("a", False, error)])
+        self.assertEqual(len(transport.calls), 3)
+
+    def test_missing_files_and_conflicts_are_not_retried(self):
+        missing = FileNotFoundError("gone")
+        conflict = SyncConflict("changed remotely", "b.json")
+        transport = FakeTransport({"a.json": [missing], "b.json": [conflict]})
+        worker = self.make_worker(transport, base_delay=0.001)
+        results = []
+        worker.download("a.json", "a.local", on_done=self.done(results, "a"))
+        worker.upload("b.json", on_done=self.done(results, "b"))
+        self.wait_for(worker, results, 2)
+
+        self.assertEqual(results, [("a", False, missing), ("b", False, conflict)])
+        self.assertEqual(len(transport.calls), 2)
+
+    def test_cancel_all_drops_queued_jobs_and_stops_retrying_the_current_one(self):
+        gate = threading.Event()
+        transport = FakeTransport({"a.json": [ConnectionError("down")]}, gate=gate)
+        worker = self.make_worker(transport, base_delay=10.0)
+        results = []
+        worker.upload("a.json", on_done=self.done(results, "a"))
+        worker.upload("b.json", on_done=self.done(results, "b"))
+        while worker.current_job is None:
+            time.sleep(0.001)
+
+        worker.cancel_all()
+        gate.set()
+        self.wait_for(worker, results, 2)
+
+        self.assertEqual([(name, success) for name, success, _ in results], [("b", False), ("a", False)])
+        self.assertTrue(all(isinstance(error, SyncCancelled) for _, _, error in results))
+        self.assertEqual([call[1] for call in transport.calls], ["a.json"])
+
+if __name__ == "__main__":
+    unittest.main()